@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import Idea, Comment, Like
+from .models import Idea, Comment, Like, Job
 
 admin.site.register(Idea)
 admin.site.register(Comment)
-admin.site.register(Like) 
\ No newline at end of file
+admin.site.register(Like)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'key', 'status', 'attempts', 'run_after', 'created_at']
+    list_filter = ['status', 'kind'] 
\ No newline at end of file
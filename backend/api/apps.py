@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api' 
-    
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        from . import checks, detail_cache, hooks, jobs  # noqa: F401 (checks and hooks register themselves)
+        from .authentication import invalidate_cached_user
+        from .db import configure_sqlite
+        from .metrics import install_query_recorder, registry
+        connection_created.connect(configure_sqlite, dispatch_uid='api.db.configure_sqlite')
+        connection_created.connect(install_query_recorder, dispatch_uid='api.metrics.install_query_recorder')
+        post_save.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL,
+                          dispatch_uid='api.authentication.invalidate_cached_user')
+        post_delete.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL,
+                            dispatch_uid='api.authentication.invalidate_cached_user')
+        registry.add_collector(jobs.metric_lines)
+        registry.add_collector(detail_cache.metric_lines)
@@ -0,0 +1,188 @@
+"""
+Native async views for the read-heavy idea endpoints.
+
+These mirror the DRF list, retrieve, comments and top-ideas endpoints (same
+payloads, pagination and conditional-GET validators) but run as Django async
+views. Under ASGI, a request waiting on the database or on a slow client
+parks a coroutine instead of holding a worker thread. Serialization runs on
+rows that are already fully loaded, with is_liked resolved up front, so the
+serializers never touch the database from the event loop.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import conditional, db, detail_cache, renderers
+from .authentication import CachedJWTAuthentication
+from .leaderboard import get_leaderboard
+from .models import Idea
+from .pagination import CommentPagination, IdeaPagination, KeysetPagination
+from .serializers import CommentSerializer, IdeaSerializer, IdeaSummarySerializer, aget_liked_idea_ids
+
+
+def _json(data, status=200):
+    # Same bytes as the DRF endpoints
+    return HttpResponse(renderers.dumps(data), status=status, content_type='application/json')
+
+
+def _not_found():
+    return _json({'detail': 'Not found.'}, status=404)
+
+
+async def _authenticate(request):
+    """Resolve the user from a JWT, falling back to the session like DRF does."""
+    result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    if result is not None:
+        return result[0]
+    return await sync_to_async(get_user)(request)
+
+
+def async_read_view(view):
+    """Allow only GET, authenticate, route reads to a replica, and answer DRF exceptions as JSON."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        try:
+            request.user = await _authenticate(request)
+            alias = await sync_to_async(db.choose_read_alias)(request)
+            token = db.read_from(alias) if alias else None
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                if token is not None:
+                    db.release(token)
+        except APIException as exc:
+            # Same body shape as DRF's default exception handler
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return _json(data, status=exc.status_code)
+    return wrapper
+
+
+async def _liked_context(request, ideas):
+    if request.user.is_authenticated:
+        liked_idea_ids = await aget_liked_idea_ids(request.user, [idea.id for idea in ideas])
+    else:
+        liked_idea_ids = set()
+    return {'request': request, 'liked_idea_ids': liked_idea_ids}
+
+
+async def _conditional(request, validators, build):
+    response = conditional.not_modified(request, *validators)
+    if response is None:
+        response = await build()
+    return conditional.set_validators(response, *validators)
+
+
+@async_read_view
+async def idea_list(request):
+    validators = await sync_to_async(conditional.collection_validators)(request)
+
+    async def build():
+        ordering = IdeaPagination.get_ordering(request.GET)
+        queryset = Idea.objects.with_summary().order_by(*ordering)
+        if KeysetPagination.cursor_query_param in request.GET:
+            paginator = KeysetPagination(ordering=ordering)
+            ideas = paginator.set_page([idea async for idea in paginator.page_queryset(queryset, request)])
+            data = IdeaSummarySerializer(ideas, many=True, context=await _liked_context(request, ideas)).data
+            return _json(paginator.get_paginated_data(data))
+
+        # Same shape as DRF's PageNumberPagination
+        page_size = PageNumberPagination.page_size
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            return _not_found()
+        count = await queryset.acount()
+        if page < 1 or (page - 1) * page_size >= max(count, 1):
+            return _json({'detail': 'Invalid page.'}, status=404)
+        offset = (page - 1) * page_size
+        ideas = [idea async for idea in queryset[offset:offset + page_size]]
+        data = IdeaSummarySerializer(ideas, many=True, context=await _liked_context(request, ideas)).data
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return _json({'count': count, 'next': next_url, 'previous': previous_url, 'results': data})
+
+    return await _conditional(request, validators, build)
+
+
+@async_read_view
+async def idea_detail(request, pk):
+    updated_at = await Idea.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return _not_found()
+    version = await sync_to_async(conditional.idea_version)(pk)
+    validators = await sync_to_async(conditional.idea_validators)(request, pk, updated_at, version)
+
+    async def build():
+        idea = await Idea.objects.with_related().filter(pk=pk).afirst()
+        if idea is None:
+            return _not_found()
+        return _json(IdeaSerializer(idea, context=await _liked_context(request, [idea])).data)
+
+    async def build_cached():
+        async def render():
+            idea = await Idea.objects.with_related().filter(pk=pk).afirst()
+            if idea is None:
+                return None
+            return renderers.dumps(IdeaSerializer(idea, context={'request': request, 'liked_idea_ids': set()}).data)
+
+        key = detail_cache.detail_key(request, pk, updated_at, version)
+        body = await detail_cache.get_detail_cache().aget(key, render, validators[1])
+        if body is None:
+            return _not_found()
+        liked = request.user.is_authenticated and pk in await aget_liked_idea_ids(request.user, [pk])
+        return HttpResponse(detail_cache.with_liked(body, liked), content_type='application/json')
+
+    return await _conditional(request, validators, build_cached if detail_cache.enabled() else build)
+
+
+@async_read_view
+async def idea_comments(request, pk):
+    if not await Idea.objects.filter(pk=pk).aexists():
+        return _not_found()
+    idea = Idea(pk=pk)
+    paginator = CommentPagination()
+    queryset = paginator.page_queryset(idea.comments.select_related('commenter'), request)
+    comments = paginator.set_page([comment async for comment in queryset])
+    return _json(paginator.get_paginated_data(CommentSerializer(comments, many=True).data))
+
+
+@async_read_view
+async def top_ideas(request):
+    version = await sync_to_async(conditional.collection_version)()
+    validators = await sync_to_async(conditional.collection_validators)(request, version)
+
+    async def build():
+        board = get_leaderboard()
+        if request.GET.get(IdeaPagination.ordering_query_param) == 'hot':
+            ordering = IdeaPagination.orderings['hot']
+            ideas = [idea async for idea in Idea.objects.with_summary().order_by(*ordering)[:board.size]]
+            return _json(IdeaSummarySerializer(ideas, many=True, context=await _liked_context(request, ideas)).data)
+        state = board.peek(version) or await sync_to_async(board.get)(version)
+        entries = [dict(entry) for entry in state['entries'][:board.size]]
+        if request.user.is_authenticated:
+            liked_idea_ids = await aget_liked_idea_ids(request.user, [entry['id'] for entry in entries])
+        else:
+            liked_idea_ids = set()
+        for entry in entries:
+            entry['is_liked'] = entry['id'] in liked_idea_ids
+        fields = request.GET.get('fields')
+        if fields:
+            keep = {name.strip() for name in fields.split(',')}
+            entries = [{k: v for k, v in entry.items() if k in keep} for entry in entries]
+        return _json(entries)
+
+    return await _conditional(request, validators, build)
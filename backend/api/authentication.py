@@ -0,0 +1,107 @@
+"""
+JWT authentication that resolves users from a small in-process cache.
+
+Stock ``JWTAuthentication`` loads the ``User`` row on every authenticated
+request. :class:`CachedJWTAuthentication` keeps recently seen users in a
+bounded LRU cache keyed by the token's user id claim, so repeat requests
+from the same user skip that query. Entries expire after
+``AUTH_USER_CACHE['TIMEOUT']`` seconds and are dropped as soon as the user
+is saved or deleted in this process. Other processes notice a change once
+their entries expire, so the timeout bounds how long a deactivated user
+can keep using a still-valid access token.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+class UserCache:
+    """Thread-safe LRU cache of users with a per-entry time to live."""
+
+    def __init__(self, max_size=10000, timeout=60):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # Each request gets its own instance, so nothing leaks between them
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        user = copy.copy(user)
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + self.timeout)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                options = getattr(settings, 'AUTH_USER_CACHE', {})
+                _user_cache = UserCache(
+                    max_size=options.get('MAX_SIZE', 10000),
+                    timeout=options.get('TIMEOUT', 60),
+                )
+    return _user_cache
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the user model, connected in ApiConfig.ready()."""
+    get_user_cache().invalidate(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the token's user from :class:`UserCache`."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cache = get_user_cache()
+        user = cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(user_id, user)
+            return user
+
+        # Inactive users are never cached, but a changed password has to be
+        # checked against each token
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,26 @@
+"""
+A file-based cache cheap enough to hold per-write state.
+
+Django's ``FileBasedCache`` is shared by every process on a host, but it
+lists its whole directory on every ``set()`` to decide whether to cull, so
+a write costs time proportional to the number of entries. :class:`FileCache`
+does that check only once every ``CULL_EVERY`` writes (an ``OPTIONS`` key,
+default 100), so the directory can briefly exceed ``MAX_ENTRIES`` by that
+many files.
+"""
+
+import itertools
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class FileCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        self._writes = itertools.count(1)
+
+    def _cull(self):
+        # next() on a count is atomic under the GIL
+        if next(self._writes) % self._cull_every == 0:
+            super()._cull()
@@ -0,0 +1,49 @@
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from .search import fts_available, index_exists, missing_triggers
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Warn when the triggers that keep the search index in step are gone."""
+    errors = []
+    for alias in databases or []:
+        if not fts_available(alias) or not index_exists(alias):
+            continue
+        missing = missing_triggers(alias)
+        if missing:
+            errors.append(Warning(
+                f'The search index on database {alias!r} is missing trigger(s) {", ".join(missing)}, '
+                'so new and edited ideas are not searchable.',
+                hint='Run `python manage.py rebuild_search_index`.',
+                id='api.W001',
+            ))
+    return errors
+
+
+# Settings whose CACHE_ALIAS must be one cache seen by every server process
+SHARED_CACHE_SETTINGS = ('CONDITIONAL_GET', 'DATABASE_REPLICATION', 'DETAIL_CACHE')
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """Warn when several processes are expected but shared state sits in a per-process cache."""
+    # The worker count gunicorn and uvicorn read by default
+    if int(os.environ.get('WEB_CONCURRENCY') or 1) <= 1:
+        return []
+    errors = []
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name, {}).get('CACHE_ALIAS', 'default')
+        if alias and isinstance(caches[alias], LocMemCache):
+            errors.append(Warning(
+                f"{name}['CACHE_ALIAS'] is {alias!r}, a per-process LocMemCache, but WEB_CONCURRENCY "
+                'starts several processes; each would keep its own copy instead of sharing one.',
+                hint='Point it at a cache shared by every process, such as the file or Redis cache.',
+                id='api.W002',
+            ))
+    return errors
@@ -0,0 +1,116 @@
+"""
+Validators for conditional GETs on idea resources.
+
+List and top-ideas responses are versioned by a collection counter, and each
+idea by its ``updated_at`` plus a per-idea counter (likes and comments do not
+touch ``updated_at``). The counters live in a Django cache and are bumped by
+every write that changes what those endpoints return, so a poll carrying
+``If-None-Match`` or ``If-Modified-Since`` is answered with a 304 without
+touching the serializer. Multi-process deployments must point
+``CONDITIONAL_GET['CACHE_ALIAS']`` at a cache shared by every process.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import db
+
+COLLECTION_KEY = 'api:ideas:version'
+IDEA_KEY = 'api:idea:{}:version'
+
+
+def _cache():
+    return caches[getattr(settings, 'CONDITIONAL_GET', {}).get('CACHE_ALIAS', 'default')]
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def _get_version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        # Unknown (first use or evicted): start a fresh version so no client
+        # can match a validator issued before the counter was lost.
+        version = _now_us()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    # Versions are microsecond timestamps so they double as Last-Modified
+    cache = _cache()
+    previous = cache.get(key)
+    version = max(_now_us(), (previous or 0) + 1)
+    cache.set(key, version, None)
+    return previous, version
+
+
+def bump_idea_version(idea_id=None):
+    """
+    Record a write to one idea (or the collection only, for creates).
+    Returns the collection version before and after the write.
+    """
+    versions = _bump(COLLECTION_KEY)
+    if idea_id is not None:
+        _bump(IDEA_KEY.format(idea_id))
+    return versions
+
+
+def _make_etag(request, *parts):
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    raw = '|'.join(str(part) for part in (*parts, user_id, request.get_full_path()))
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def collection_version():
+    """Current version of the idea collection; changes on every idea write."""
+    return _get_version(COLLECTION_KEY)
+
+
+def collection_validators(request, version=None):
+    if version is None:
+        version = collection_version()
+    return _make_etag(request, 'ideas', version), version // 1_000_000
+
+
+def idea_version(idea_id):
+    """Current version of one idea; changes on every write that bumps it."""
+    return _get_version(IDEA_KEY.format(idea_id))
+
+
+def idea_validators(request, idea_id, updated_at, version=None):
+    if version is None:
+        version = idea_version(idea_id)
+    last_modified = max(int(updated_at.timestamp()), version // 1_000_000)
+    return _make_etag(request, 'idea', idea_id, updated_at.isoformat(), version), last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the client's copy is current, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        _set_headers(response, etag, last_modified)
+    return response
+
+
+def _set_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Responses differ per user because of is_liked
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    # A replica may not have this change yet; don't tie its body to the version
+    if response.status_code == 200 and not db.may_be_stale(last_modified):
+        _set_headers(response, etag, last_modified)
+    return response
@@ -0,0 +1,131 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the ``default`` (primary) database. Safe requests to the
+idea, comment and top-ideas views read from one of
+``DATABASE_REPLICATION['REPLICAS']``, picked once per request so a response
+never mixes replicas. Everything else, authentication included, keeps
+reading from the primary.
+
+Replicas lag behind the primary, so two things fall back to it:
+
+* A user who just wrote anything through those views reads from the primary
+  for ``MAX_LAG`` seconds afterwards (read-your-writes). The marker lives in
+  the ``CACHE_ALIAS`` cache, which must be shared by every server process.
+* A response read from a replica about a resource that changed within the
+  last ``MAX_LAG`` seconds is sent without ETag/Last-Modified, so a client
+  can't pin a stale body to the new version (see api/conditional.py).
+
+``MAX_LAG`` must be an upper bound on replication lag. The local SQLite
+stand-in for a replica is refreshed with ``manage.py sync_replicas``.
+"""
+
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+STICKY_KEY = 'api:db:sticky:{}'
+
+_read_alias = contextvars.ContextVar('api_read_alias', default=None)
+
+
+def _options():
+    return getattr(settings, 'DATABASE_REPLICATION', {})
+
+
+def replicas():
+    return [alias for alias in _options().get('REPLICAS', []) if alias in settings.DATABASES]
+
+
+def max_lag():
+    return _options().get('MAX_LAG', 5)
+
+
+def _cache():
+    return caches[_options().get('CACHE_ALIAS', 'default')]
+
+
+def mark_written(user):
+    """Pin ``user``'s reads to the primary until replicas have caught up."""
+    if user.is_authenticated and replicas():
+        _cache().set(STICKY_KEY.format(user.pk), 1, max_lag())
+
+
+def choose_read_alias(request):
+    """Return the replica this request should read from, or None for the primary."""
+    aliases = replicas()
+    if not aliases or request.method not in SAFE_METHODS:
+        return None
+    if request.user.is_authenticated and _cache().get(STICKY_KEY.format(request.user.pk)) is not None:
+        return None
+    return random.choice(aliases)
+
+
+def read_from(alias):
+    """Route reads in the current context to ``alias``; returns a reset token."""
+    return _read_alias.set(alias)
+
+
+def release(token):
+    _read_alias.reset(token)
+
+
+def may_be_stale(last_modified):
+    """Whether a response last modified at ``last_modified`` (a Unix time) could predate the replica."""
+    return _read_alias.get() is not None and time.time() - last_modified < max_lag()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        aliases = {PRIMARY, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve a DRF view's safe requests from a replica, and make writers sticky."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        alias = choose_read_alias(request)
+        self._replica_token = read_from(alias) if alias else None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            release(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_written(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created receiver, connected in ApiConfig.ready(). WAL lets
+    readers carry on while a write is in progress, and synchronous=NORMAL
+    is durable enough in WAL mode while syncing far less often.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
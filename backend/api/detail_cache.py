@@ -0,0 +1,192 @@
+"""
+Read-through cache for rendered idea detail bodies.
+
+The detail payload is the same for every reader except ``is_liked``, so the
+body is rendered once with ``is_liked`` false, cached as JSON bytes, and
+patched per request: a reader who likes the idea gets the final ``false``
+swapped for ``true``. Anonymous readers skip the like lookup, so a cache hit
+answers them without touching the database beyond the existence check.
+
+Entries are keyed by the idea's conditional-GET version (see
+api/conditional.py) and ``updated_at``. Every edit, like and comment bumps
+the version, so a write never has to find and delete cached bodies; stale
+ones just stop being asked for and age out. There are two tiers:
+
+* a bounded in-process LRU of ``MAX_SIZE`` bodies, checked first
+* the Django cache named by ``CACHE_ALIAS``, kept for ``TIMEOUT`` seconds.
+  By default this is the ``shared`` cache: files seen by every process on
+  the host, or Redis across hosts (see ``SHARED_CACHE_URL`` in settings).
+  A per-process cache here would only be a second copy of the LRU.
+
+Bodies read from a replica that may lag behind the version are served but
+not stored. Lookups by tier (local hit, shared hit, miss) and the time taken
+to produce the body are exported at /api/metrics/.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import db
+from .metrics import DURATION_BUCKETS, Histogram
+
+KEY = 'api:idea:{}:detail:{}:{}:{}'
+RESULTS = ('local', 'shared', 'miss')
+# is_liked is the last field of IdeaSerializer
+UNLIKED = b'"is_liked":false}'
+LIKED = b'"is_liked":true}'
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _options():
+    return getattr(settings, 'DETAIL_CACHE', {})
+
+
+def enabled():
+    return _options().get('ENABLED', True)
+
+
+def detail_key(request, idea_id, updated_at, version):
+    # comments_next is an absolute URL, so the host is part of the body
+    origin = f'{request.scheme}://{request.get_host()}'
+    return KEY.format(idea_id, version, int(updated_at.timestamp() * 1_000_000), origin)
+
+
+def with_liked(body, liked):
+    """Patch the reader's like state into a body cached with is_liked false."""
+    return body[:-len(UNLIKED)] + LIKED if liked else body
+
+
+class DetailCache:
+    """Process-local LRU in front of an optional shared Django cache."""
+
+    def __init__(self, max_size=1000, shared=None, timeout=3600):
+        self.max_size = max_size
+        self.shared = shared
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.lookups = dict.fromkeys(RESULTS, 0)
+        self.durations = {result: Histogram(DURATION_BUCKETS) for result in RESULTS}
+
+    def _get_local(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def _set_local(self, key, body):
+        if not self.max_size:
+            return
+        with self.lock:
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key, build, last_modified):
+        """
+        Return the cached body for ``key``, calling ``build()`` for the
+        rendered body on a miss. ``build`` may return None (idea gone).
+        """
+        started = time.perf_counter()
+        result = 'local'
+        body = self._get_local(key)
+        if body is None and self.shared is not None:
+            result = 'shared'
+            body = self.shared.get(key)
+            if body is not None:
+                self._set_local(key, body)
+        if body is None:
+            result = 'miss'
+            body = build()
+            if body is None:
+                return None
+            if not db.may_be_stale(last_modified):
+                self._set_local(key, body)
+                if self.shared is not None:
+                    self.shared.set(key, body, self.timeout)
+        self.observe(result, time.perf_counter() - started)
+        return body
+
+    async def aget(self, key, build, last_modified):
+        """Async :meth:`get`; ``build`` is a coroutine function."""
+        started = time.perf_counter()
+        result = 'local'
+        body = self._get_local(key)
+        if body is None and self.shared is not None:
+            result = 'shared'
+            body = await self.shared.aget(key)
+            if body is not None:
+                self._set_local(key, body)
+        if body is None:
+            result = 'miss'
+            body = await build()
+            if body is None:
+                return None
+            if not db.may_be_stale(last_modified):
+                self._set_local(key, body)
+                if self.shared is not None:
+                    await self.shared.aset(key, body, self.timeout)
+        self.observe(result, time.perf_counter() - started)
+        return body
+
+    def observe(self, result, duration):
+        with self.lock:
+            self.lookups[result] += 1
+            self.durations[result].observe(duration)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def metric_lines(self):
+        """Prometheus collector for the metrics registry (see api/metrics.py)."""
+        lines = [
+            '# HELP api_detail_cache_lookups_total Idea detail bodies served, by cache tier (or miss)',
+            '# TYPE api_detail_cache_lookups_total counter',
+        ]
+        with self.lock:
+            for result in RESULTS:
+                lines.append(f'api_detail_cache_lookups_total{{result="{result}"}} {self.lookups[result]}')
+            lines.append('# HELP api_detail_cache_duration_seconds Time to produce an idea detail body')
+            lines.append('# TYPE api_detail_cache_duration_seconds histogram')
+            for result in RESULTS:
+                histogram = self.durations[result]
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'api_detail_cache_duration_seconds_bucket{{result="{result}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'api_detail_cache_duration_seconds_sum{{result="{result}"}} {histogram.sum:.6f}')
+                lines.append(f'api_detail_cache_duration_seconds_count{{result="{result}"}} {histogram.count}')
+            lines.append("# HELP api_detail_cache_entries Bodies held in this process's LRU")
+            lines.append('# TYPE api_detail_cache_entries gauge')
+            lines.append(f'api_detail_cache_entries {len(self.entries)}')
+        return lines
+
+
+def get_detail_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                options = _options()
+                alias = options.get('CACHE_ALIAS')
+                _cache = DetailCache(
+                    max_size=options.get('MAX_SIZE', 1000),
+                    shared=caches[alias] if alias else None,
+                    timeout=options.get('TIMEOUT', 3600),
+                )
+    return _cache
+
+
+def metric_lines():
+    return get_detail_cache().metric_lines()
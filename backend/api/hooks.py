@@ -0,0 +1,106 @@
+"""
+Follow-up work for writes to ideas, likes and comments.
+
+Views call these after a successful write so that every derived structure
+(leaderboard, conditional-GET versions, realtime streams, ...) hears about it
+in one place. Anything the response and the next read don't depend on is
+queued as a job (see api/jobs.py) instead of run before responding.
+"""
+
+from . import jobs, realtime
+from .conditional import bump_idea_version
+from .leaderboard import get_leaderboard
+from .models import Idea
+
+
+def _on_board(idea_id):
+    leaderboard = get_leaderboard()
+    state = leaderboard.peek()
+    return state is not None and any(entry['id'] == idea_id for entry in state['entries'][:leaderboard.size])
+
+
+def _publish(idea_id, event, was_on_board=False):
+    """
+    Push an event to the idea's subscribers, and to leaderboard subscribers
+    when the idea was on the board before the write or is on it after.
+    """
+    realtime.publish(realtime.idea_channel(idea_id), event)
+    if get_leaderboard().peek() is None:
+        # The board was dropped, so the top ideas may have changed
+        realtime.publish(realtime.LEADERBOARD_CHANNEL, realtime.RESYNC)
+    elif was_on_board or _on_board(idea_id):
+        realtime.publish(realtime.LEADERBOARD_CHANNEL, event)
+
+
+def _rescore(idea_id):
+    jobs.enqueue('rescore_ideas', {'idea_id': idea_id}, key=f'rescore_ideas:{idea_id}')
+
+
+@jobs.handler('rescore_ideas')
+def rescore_ideas(payloads):
+    """Recompute hot_score for ideas whose comments changed."""
+    Idea.objects.filter(pk__in={payload['idea_id'] for payload in payloads}).refresh_hot_scores()
+    # Only the hot ordering of lists depends on the score
+    bump_idea_version()
+
+
+def idea_created(idea):
+    bump_idea_version()
+    get_leaderboard().record_idea_created()
+
+
+def idea_changed(idea_id):
+    """An idea was edited or deleted."""
+    was_on_board = _on_board(idea_id)
+    bump_idea_version(idea_id)
+    get_leaderboard().record_idea_changed(idea_id)
+    _publish(idea_id, {'type': 'idea_changed', 'idea_id': idea_id}, was_on_board)
+
+
+def likes_changed(idea_id, likes_count=None, counted=True):
+    """
+    A like was toggled. ``counted`` is False when only the user's own like
+    state moved and likes_count will be applied later by the like buffer.
+    """
+    versions = bump_idea_version(idea_id)
+    if counted:
+        was_on_board = _on_board(idea_id)
+        get_leaderboard().record_likes(idea_id, likes_count, versions)
+        _publish(idea_id, {'type': 'likes', 'idea_id': idea_id, 'likes_count': likes_count}, was_on_board)
+
+
+def likes_flushed(idea_ids):
+    """The like buffer applied a batch of likes to these ideas."""
+    for idea_id in idea_ids:
+        bump_idea_version(idea_id)
+        # The new counts aren't known here; clients refetch the idea
+        realtime.publish(realtime.idea_channel(idea_id), {'type': 'idea_changed', 'idea_id': idea_id})
+    get_leaderboard().invalidate()
+    realtime.publish(realtime.LEADERBOARD_CHANNEL, {'type': 'resync'})
+
+
+def comment_added(comment):
+    from .serializers import CommentSerializer
+
+    idea_id = comment.idea_id
+    versions = bump_idea_version(idea_id)
+    _rescore(idea_id)
+    get_leaderboard().record_comment(idea_id, versions=versions)
+    _publish(idea_id, {'type': 'comment', 'idea_id': idea_id, 'comment': CommentSerializer(comment).data})
+
+
+def comment_changed(comment):
+    from .serializers import CommentSerializer
+
+    bump_idea_version(comment.idea_id)
+    realtime.publish(
+        realtime.idea_channel(comment.idea_id),
+        {'type': 'comment_changed', 'idea_id': comment.idea_id, 'comment': CommentSerializer(comment).data},
+    )
+
+
+def comment_removed(idea_id, comment_id):
+    versions = bump_idea_version(idea_id)
+    _rescore(idea_id)
+    get_leaderboard().record_comment(idea_id, -1, versions)
+    _publish(idea_id, {'type': 'comment_removed', 'idea_id': idea_id, 'comment_id': comment_id})
@@ -0,0 +1,162 @@
+"""
+A small database-backed queue for deferred follow-up work.
+
+Request handlers call :func:`enqueue` and move on; ``manage.py run_jobs``
+runs the work later. A job is one row of the ``Job`` table, inserted with a
+single statement that commits together with the caller's transaction when
+there is one.
+
+* **Idempotent keys**: a job enqueued with a ``key`` is dropped while a pending
+  job with the same key exists, so a burst of writes to one idea leaves one
+  job behind. A job that is already running doesn't count, so work enqueued
+  after a run starts is never lost. Keyed handlers must therefore recompute
+  from the database rather than apply deltas.
+* **Batching**: the worker claims up to ``BATCH_SIZE`` ready jobs at a time
+  and hands each handler the payloads of all claimed jobs of its kind in one
+  call.
+* **Retries**: a failing batch is retried with exponential backoff
+  (``RETRY_DELAY`` seconds, doubling) and marked failed after
+  ``MAX_ATTEMPTS``. A worker that dies mid-batch loses its claim after
+  ``LEASE`` seconds and another worker picks the jobs up.
+* **Backlog**: pending and failed jobs per kind are exported as the
+  ``api_job_backlog`` gauge at /api/metrics/.
+
+With ``JOBS['ASYNC']`` off, :func:`enqueue` runs the handler on the spot,
+which is handy in development when no worker is running.
+"""
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('kind', 'key', 'payload', 'status', 'attempts', 'run_after', 'locked_by', 'last_error', 'created_at')
+
+_handlers = {}
+
+
+def _options():
+    return getattr(settings, 'JOBS', {})
+
+
+def handler(kind):
+    """Register ``fn(payloads)`` as the handler for jobs of ``kind``."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, key=None, delay=0):
+    """Queue a ``kind`` job; with a ``key``, only if none is pending for it already."""
+    payload = payload or {}
+    if not _options().get('ASYNC', True):
+        _handlers[kind]([payload])
+        return
+    now = timezone.now()
+    run_after = now + timedelta(seconds=delay)
+    payload_field = Job._meta.get_field('payload')
+    columns = ', '.join(map(connection.ops.quote_name, COLUMNS))
+    # One statement, no transaction of its own; a duplicate pending key is
+    # skipped by the partial unique index
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Job._meta.db_table} ({columns}) '
+            f"VALUES (%s, %s, %s, %s, 0, %s, '', '', %s) ON CONFLICT DO NOTHING",
+            [
+                kind, key, payload_field.get_db_prep_value(payload, connection), Job.PENDING,
+                connection.ops.adapt_datetimefield_value(run_after),
+                connection.ops.adapt_datetimefield_value(now),
+            ],
+        )
+
+
+def _ready(now):
+    lease_expired = Q(status=Job.RUNNING, locked_until__lt=now)
+    return Q(status=Job.PENDING, run_after__lte=now) | lease_expired
+
+
+def claim(batch_size=None):
+    """Claim up to ``batch_size`` ready jobs for this worker, oldest first."""
+    options = _options()
+    batch_size = batch_size or options.get('BATCH_SIZE', 500)
+    now = timezone.now()
+    ids = list(Job.objects.filter(_ready(now)).order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Re-checking readiness in the UPDATE makes concurrent workers claim
+    # disjoint sets of jobs
+    Job.objects.filter(_ready(now), pk__in=ids).update(
+        status=Job.RUNNING, locked_by=token, attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=options.get('LEASE', 60)),
+    )
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING).order_by('id'))
+
+
+def _retry(jobs, error):
+    options = _options()
+    max_attempts = options.get('MAX_ATTEMPTS', 5)
+    delay = options.get('RETRY_DELAY', 5)
+    now = timezone.now()
+    ids = [job.pk for job in jobs]
+    # A pending job with the same key will redo the same work
+    Job.objects.filter(
+        pk__in=ids, key__in=Job.objects.filter(status=Job.PENDING, key__isnull=False).values('key')
+    ).delete()
+    for job in jobs:
+        if job.attempts >= max_attempts:
+            changes = {'status': Job.FAILED}
+        else:
+            changes = {'status': Job.PENDING, 'run_after': now + timedelta(seconds=delay * 2 ** (job.attempts - 1))}
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            locked_by='', locked_until=None, last_error=error, **changes
+        )
+
+
+def run_batch(batch_size=None):
+    """Claim and run one batch of jobs. Returns the number of jobs claimed."""
+    jobs = claim(batch_size)
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+    for kind, batch in by_kind.items():
+        started = time.perf_counter()
+        try:
+            fn = _handlers.get(kind)
+            if fn is None:
+                raise LookupError(f'No handler registered for job kind {kind!r}')
+            fn([job.payload for job in batch])
+        except Exception as exc:
+            logger.exception('Job batch %s (%d jobs) failed', kind, len(batch))
+            _retry(batch, f'{type(exc).__name__}: {exc}')
+        else:
+            Job.objects.filter(pk__in=[job.pk for job in batch]).delete()
+            logger.debug('Ran %d %s job(s) in %.3fs', len(batch), kind, time.perf_counter() - started)
+    return len(jobs)
+
+
+def backlog():
+    """Return ``{(kind, status): count}`` for jobs not yet done."""
+    rows = Job.objects.values_list('kind', 'status').annotate(total=Count('*')).order_by()
+    return {(kind, status): total for kind, status, total in rows}
+
+
+def metric_lines():
+    """Prometheus collector for the metrics registry (see api/metrics.py)."""
+    lines = [
+        '# HELP api_job_backlog Jobs waiting to run (pending, running) or given up on (failed)',
+        '# TYPE api_job_backlog gauge',
+    ]
+    for (kind, status), total in sorted(backlog().items()):
+        lines.append(f'api_job_backlog{{kind="{kind}",status="{status}"}} {total}')
+    return lines
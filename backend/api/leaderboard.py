@@ -0,0 +1,227 @@
+"""
+In-memory top-ideas leaderboard.
+
+The board keeps the top ``DEPTH`` idea summaries sorted by the same key as
+``Idea.Meta.ordering`` and serves the top ``SIZE`` as a pre-rendered JSON
+body. Write paths feed it the numbers they already have (a like's new
+likes_count, a new comment), so it is updated in place without re-querying.
+Only when a change can move an unseen idea onto the board is it dropped and
+rebuilt, and rebuilds are single-flight: concurrent readers wait for the one
+rebuild in progress instead of all querying at once.
+
+Each board is stamped with the conditional-GET collection version it
+reflects (see api/conditional.py), and readers pass the current version in:
+a board stamped with another version missed a write, possibly one handled by
+another process, and is rebuilt. An in-place update moves the stamp forward
+only when the board was current just before its own write, so a concurrent
+write it didn't see still forces a rebuild. This keeps the top-ideas body in
+step with the ETag it is served under.
+
+With ``LEADERBOARD['CACHE_ALIAS']`` set the board lives in that Django cache
+so every server process shares it and applies the others' updates;
+otherwise each process keeps its own and rebuilds it after writes handled
+elsewhere. Either way a board is dropped once it is ``TIMEOUT`` seconds old.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+
+from .models import Idea
+from .renderers import dumps
+
+CACHE_KEY = 'api:leaderboard'
+LOCK_KEY = 'api:leaderboard:rebuild'
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def _sort_key(entry):
+    return (entry['likes_count'], entry['created_at'], entry['id'])
+
+
+class Leaderboard:
+    def __init__(self, size=5, depth=20, cache_alias=None, timeout=300):
+        self.size = size
+        self.depth = max(depth, size)
+        self.cache = caches[cache_alias] if cache_alias else None
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._state = None
+
+    def _load(self, version=None):
+        if self.cache is not None:
+            state = self.cache.get(CACHE_KEY)
+        else:
+            state = self._state
+            if state is not None and time.time() - state['built_at'] >= self.timeout:
+                # In-place updates don't extend it, as the cache TIMEOUT doesn't
+                self._state = state = None
+        if state is not None and version is not None and state['version'] != version:
+            return None
+        return state
+
+    def _store(self, state):
+        if self.cache is not None:
+            if state is None:
+                self.cache.delete(CACHE_KEY)
+            else:
+                self.cache.set(CACHE_KEY, state, self.timeout)
+        else:
+            self._state = state
+
+    def _render(self, entries):
+        top = [dict(entry, is_liked=False) for entry in entries[:self.size]]
+        return dumps(top)
+
+    def _build(self, version):
+        from .serializers import IdeaSummarySerializer
+
+        # The board outlives this request, so build it from the primary
+        ideas = list(Idea.objects.using(router.db_for_write(Idea)).with_summary()[:self.depth])
+        entries = [dict(entry) for entry in IdeaSummarySerializer(ideas, many=True).data]
+        for entry in entries:
+            entry.pop('is_liked', None)
+            entry['pitcher'] = dict(entry['pitcher'])
+        return {
+            'entries': entries,
+            # Fewer rows than asked for means the board holds every idea
+            'complete': len(entries) < self.depth,
+            'body': self._render(entries),
+            'built_at': time.time(),
+            'version': version,
+        }
+
+    def peek(self, version=None):
+        """
+        Return the board state, or None if it needs a rebuild. With a
+        collection ``version``, a board stamped with another one needs it too.
+        """
+        return self._load(version)
+
+    def get(self, version):
+        """
+        Return the board state for collection ``version``, rebuilding it at
+        most once at a time.
+        """
+        state = self._load(version)
+        if state is not None:
+            return state
+        with self._lock:
+            state = self._load(version)
+            if state is not None:
+                return state
+            if self.cache is not None and not self.cache.add(LOCK_KEY, 1, 10):
+                # Another process is rebuilding; give it a moment to publish
+                for _ in range(20):
+                    time.sleep(0.05)
+                    state = self._load(version)
+                    if state is not None:
+                        return state
+            try:
+                # Anything written after `version` is read makes it stale again
+                state = self._build(version)
+                self._store(state)
+            finally:
+                if self.cache is not None:
+                    self.cache.delete(LOCK_KEY)
+            return state
+
+    def invalidate(self):
+        with self._lock:
+            self._store(None)
+
+    @staticmethod
+    def _restamp(state, versions):
+        # Only a board that was current before this write is current after it
+        previous, version = versions or (None, None)
+        if previous is not None and state['version'] == previous:
+            state['version'] = version
+
+    def _update(self, idea_id, change, versions=None):
+        with self._lock:
+            state = self._load()
+            if state is None:
+                return
+            entries = state['entries']
+            entry = next((e for e in entries if e['id'] == idea_id), None)
+            if entry is not None and change(state, entry) is False:
+                return
+            if entry is not None:
+                entries.sort(key=_sort_key, reverse=True)
+                state['body'] = self._render(entries)
+            self._restamp(state, versions)
+            self._store(state)
+
+    def record_likes(self, idea_id, likes_count, versions=None):
+        """
+        Apply a like or unlike whose resulting likes_count is known.
+        ``versions`` is the collection version before and after the write,
+        as returned by ``bump_idea_version``.
+        """
+        with self._lock:
+            state = self._load()
+            if state is None:
+                return
+            if likes_count is None:
+                self.invalidate()
+                return
+            entries = state['entries']
+            if not any(e['id'] == idea_id for e in entries):
+                # An unseen idea may have climbed onto the board
+                if state['complete'] or likes_count >= entries[-1]['likes_count']:
+                    self.invalidate()
+                else:
+                    self._restamp(state, versions)
+                    self._store(state)
+                return
+
+            def change(state, entry):
+                entries = state['entries']
+                dropped = likes_count < entry['likes_count']
+                entry['likes_count'] = likes_count
+                entries.sort(key=_sort_key, reverse=True)
+                if dropped and not state['complete'] and entries[-1] is entry:
+                    # Unseen ideas may now outrank it, so it can't stay
+                    entries.pop()
+                    if len(entries) < self.size:
+                        self.invalidate()
+                        return False
+
+            self._update(idea_id, change, versions)
+
+    def record_comment(self, idea_id, delta=1, versions=None):
+        def change(state, entry):
+            entry['comments_count'] += delta
+
+        self._update(idea_id, change, versions)
+
+    def record_idea_created(self):
+        state = self._load()
+        if state is not None and state['complete']:
+            self.invalidate()
+
+    def record_idea_changed(self, idea_id):
+        """Drop the board if an edited or deleted idea is on it."""
+        state = self._load()
+        if state is not None and any(e['id'] == idea_id for e in state['entries']):
+            self.invalidate()
+
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                config = getattr(settings, 'LEADERBOARD', {})
+                _leaderboard = Leaderboard(
+                    size=config.get('SIZE', 5),
+                    depth=config.get('DEPTH', 20),
+                    cache_alias=config.get('CACHE_ALIAS'),
+                    timeout=config.get('TIMEOUT', 300),
+                )
+    return _leaderboard
@@ -0,0 +1,201 @@
+"""
+Write-behind buffering for like/unlike events.
+
+When ``LIKE_BUFFER['ENABLED']`` is set, the like endpoint no longer writes to
+the database itself. Each event is appended to a local log file and recorded
+in an in-memory map of pending like states, and a background flusher applies
+the collapsed states to ``Like`` and ``Idea.likes_count`` in large batched
+transactions. Repeated toggles by the same user on the same idea collapse to
+the last state, so a flush costs a handful of statements per batch instead of
+a write transaction per request.
+
+The log lets pending events survive a crash: it is replayed when the buffer
+starts. Pending states are only known to the process that recorded them, so
+the mode needs one server process per log path. The buffer enforces this
+with an exclusive lock on ``<LOG_PATH>.lock`` (where ``fcntl`` is available):
+a second process starting a buffer on the same log, such as another
+gunicorn or uvicorn worker, fails with ImproperlyConfigured instead of
+losing events.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from .models import Like
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+class LikeBuffer:
+    def __init__(self, log_path, batch_size=5000, flush_interval=1.0):
+        self.log_path = str(log_path)
+        self.flushing_path = self.log_path + '.flushing'
+        self._lock_file = self._acquire()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._flushing = {}
+        self._recover()
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._flusher = None
+        if self._flushing:
+            self._ensure_flusher()
+
+    def _acquire(self):
+        """Lock the log for this process, or fail if another one owns it."""
+        lock_file = open(self.log_path + '.lock', 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise ImproperlyConfigured(
+                    f'Another process is buffering likes in {self.log_path}. LIKE_BUFFER '
+                    'needs a single server process per LOG_PATH; run one worker or disable it.'
+                )
+        # Held open, and locked, for the life of the process
+        return lock_file
+
+    def _recover(self):
+        # A crash can leave both a half-flushed segment and the live log
+        # behind; replay them oldest first so the last state wins.
+        for path in (self.flushing_path, self.log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self._pending[(event['u'], event['i'])] = event['liked']
+        if self._pending:
+            with open(self.flushing_path, 'w', encoding='utf-8') as segment:
+                for (user_id, idea_id), liked in self._pending.items():
+                    segment.write(json.dumps({'u': user_id, 'i': idea_id, 'liked': liked}) + '\n')
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self._flushing, self._pending = self._pending, {}
+        elif os.path.exists(self.flushing_path):
+            os.remove(self.flushing_path)
+
+    def pending_state(self, user_id, idea_id):
+        """Return the buffered like state for a user/idea pair, or None."""
+        key = (user_id, idea_id)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self._flushing.get(key)
+
+    def pending_for_user(self, user_id):
+        """Return ``{idea_id: liked}`` for every buffered event of a user."""
+        with self._lock:
+            states = {i: liked for (u, i), liked in self._flushing.items() if u == user_id}
+            states.update({i: liked for (u, i), liked in self._pending.items() if u == user_id})
+        return states
+
+    def toggle(self, user_id, idea_id):
+        """Record a toggle and return True if the idea is now liked."""
+        with self._lock:
+            current = self._pending.get((user_id, idea_id))
+            if current is None:
+                current = self._flushing.get((user_id, idea_id))
+        if current is None:
+            current = Like.objects.filter(user_id=user_id, idea_id=idea_id).exists()
+        return self.record(user_id, idea_id, not current)
+
+    def record(self, user_id, idea_id, liked):
+        with self._lock:
+            self._log.write(json.dumps({'u': user_id, 'i': idea_id, 'liked': liked}) + '\n')
+            self._log.flush()
+            self._pending[(user_id, idea_id)] = liked
+            full = len(self._pending) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+        return liked
+
+    def flush(self):
+        """Apply every buffered event to the database; return the number applied."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._flushing:
+                    if not self._pending:
+                        return 0
+                    # Swap in a fresh log so new events keep arriving while
+                    # this batch is written out.
+                    self._log.close()
+                    os.replace(self.log_path, self.flushing_path)
+                    self._log = open(self.log_path, 'a', encoding='utf-8')
+                    self._flushing, self._pending = self._pending, {}
+                batch = dict(self._flushing)
+            Like.objects.apply_states(batch)
+            from .hooks import likes_flushed
+            likes_flushed({idea_id for _, idea_id in batch})
+            with self._lock:
+                self._flushing = {}
+                os.remove(self.flushing_path)
+            return len(batch)
+
+    def close(self):
+        """
+        Release the log without flushing; whatever is still buffered is
+        replayed by the next buffer opened on it.
+        """
+        with self._lock:
+            self._log.close()
+            self._lock_file.close()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._run, name='like-buffer-flusher', daemon=True)
+                    self._flusher.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The batch stays buffered and is retried on the next tick
+                logger.exception('Failed to flush buffered like events')
+            finally:
+                connections.close_all()
+
+
+def get_like_buffer():
+    """Return the process-wide LikeBuffer, or None when the mode is disabled."""
+    global _buffer
+    config = getattr(settings, 'LIKE_BUFFER', {})
+    if not config.get('ENABLED'):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LikeBuffer(
+                    config['LOG_PATH'],
+                    batch_size=config.get('BATCH_SIZE', 5000),
+                    flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+                )
+    return _buffer
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api.export import EXPORTS, FORMATS, parse_since, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream ideas, comments or likes as NDJSON or CSV with flat memory use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson', dest='fmt')
+        parser.add_argument('--updated-since', help='ISO 8601 date or datetime; only rows changed since then, without engagement counts')
+        parser.add_argument('--output', '-o', help='File to write (default: standard output)')
+        parser.add_argument('--gzip', action='store_true', help='gzip the output')
+        parser.add_argument('--chunk-size', type=int, help='Rows read per query')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to read from')
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_since(options['updated_since'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        chunks = stream_export(
+            options['kind'], options['fmt'], updated_since,
+            using=options['database'], gzip=options['gzip'], size=options['chunk_size'],
+        )
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} bytes to {options["output"]}'))
@@ -0,0 +1,22 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from api.like_buffer import get_like_buffer
+
+
+class Command(BaseCommand):
+    help = 'Apply buffered like/unlike events from the write-behind log to the database'
+
+    def handle(self, *args, **options):
+        try:
+            like_buffer = get_like_buffer()
+        except ImproperlyConfigured as exc:
+            # A running server owns the log and flushes it itself
+            raise CommandError(str(exc))
+        if like_buffer is None:
+            raise CommandError('Like buffering is disabled (LIKE_BUFFER["ENABLED"] is False)')
+        # Recovery runs on startup, so a flush drains both the live log and
+        # any segment left behind by a crashed flush.
+        applied = like_buffer.flush()
+        applied += like_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f'Applied {applied} buffered like event(s)'))
@@ -0,0 +1,133 @@
+import random
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Comment, Idea, Like
+
+ADJECTIVES = [
+    'AI-powered', 'Sustainable', 'Decentralized', 'On-demand', 'Community-driven', 'Privacy-first',
+    'Low-cost', 'Carbon-neutral', 'Voice-controlled', 'Peer-to-peer', 'Subscription-based', 'Open-source',
+]
+PRODUCTS = [
+    'marketplace', 'delivery network', 'learning platform', 'health tracker', 'finance assistant',
+    'booking service', 'logistics hub', 'recycling program', 'rental platform', 'tutoring app',
+]
+AUDIENCES = [
+    'small farmers', 'remote teams', 'students', 'pet owners', 'retirees', 'freelancers',
+    'local restaurants', 'new parents', 'city commuters', 'independent artists',
+]
+SENTENCES = [
+    'It removes the middlemen that make the current process slow and expensive.',
+    'Early interviews show strong demand and a willingness to pay.',
+    'The first version can be built by a small team in a few months.',
+    'Revenue comes from a small commission on every transaction.',
+    'Network effects make the product more valuable with every new user.',
+    'A pilot with a local partner would validate the model quickly.',
+]
+COMMENTS = [
+    'Love this idea, I would use it tomorrow!',
+    'How would you handle the chicken-and-egg problem?',
+    'Great concept, the market timing looks right.',
+    'Have you looked at the regulatory side of this?',
+    'This could scale really well with the right partners.',
+]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible synthetic data set of users, ideas, likes and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--ideas', type=int, default=10000)
+        parser.add_argument('--likes-per-idea', type=float, default=10.0,
+                            help='Mean likes per idea; individual counts follow a power law')
+        parser.add_argument('--comments-per-idea', type=float, default=3.0,
+                            help='Mean comments per idea; individual counts follow a power law')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Ideas generated, inserted and committed per chunk (bounds memory use)')
+        parser.add_argument('--alpha', type=float, default=1.5,
+                            help='Pareto shape of the like and comment distributions (lower is more skewed)')
+
+    def handle(self, *args, **options):
+        if options['alpha'] <= 1:
+            raise CommandError('--alpha must be greater than 1')
+        rng = random.Random(options['seed'])
+        prefix = f'synthetic_{options["seed"]}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users named {prefix}* already exist; use another --seed or a fresh database')
+
+        verbose = options['verbosity'] > 0
+        started = time.perf_counter()
+        user_ids = self.create_users(prefix, options['users'], options['chunk_size'])
+        if verbose:
+            self.stdout.write(f'Created {len(user_ids)} users')
+
+        totals = {'ideas': 0, 'likes': 0, 'comments': 0}
+        remaining = options['ideas']
+        while remaining > 0:
+            size = min(options['chunk_size'], remaining)
+            chunk_totals = self.create_chunk(rng, user_ids, size, options)
+            for key, value in chunk_totals.items():
+                totals[key] += value
+            remaining -= size
+            if verbose:
+                self.stdout.write(
+                    f'  {totals["ideas"]} ideas, {totals["likes"]} likes, {totals["comments"]} comments'
+                )
+
+        # Likes went in with bulk inserts that skip Like.save, so the
+        # denormalized counters and hot scores are filled in at the end.
+        output = self.stdout if verbose else StringIO()
+        call_command('reconcile_counters', stdout=output)
+        call_command('refresh_hot_scores', stdout=output)
+        if verbose:
+            self.stdout.write(self.style.SUCCESS(
+                f'Generated {totals["ideas"]} ideas, {totals["likes"]} likes and '
+                f'{totals["comments"]} comments in {time.perf_counter() - started:.1f}s'
+            ))
+
+    def create_users(self, prefix, count, chunk_size):
+        with transaction.atomic():
+            User.objects.bulk_create(
+                (User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password='!')
+                 for i in range(count)),
+                batch_size=chunk_size,
+            )
+        return list(User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+
+    def power_law(self, rng, mean, alpha, cap):
+        # Pareto(alpha) - 1 has mean 1 / (alpha - 1); rescale it to ``mean``
+        return min(int((rng.paretovariate(alpha) - 1) * mean * (alpha - 1)), cap)
+
+    def create_chunk(self, rng, user_ids, size, options):
+        ideas = []
+        for _ in range(size):
+            audience = rng.choice(AUDIENCES)
+            product = rng.choice(PRODUCTS)
+            ideas.append(Idea(
+                title=f'{rng.choice(ADJECTIVES)} {product} for {audience}',
+                description=f'A {product} built for {audience}. ' + ' '.join(rng.sample(SENTENCES, 3)),
+                pitcher_id=rng.choice(user_ids),
+            ))
+
+        with transaction.atomic():
+            # SQLite and PostgreSQL hand back the new primary keys here
+            Idea.objects.bulk_create(ideas, batch_size=options['chunk_size'])
+            likes, comments = [], []
+            for idea in ideas:
+                like_count = self.power_law(rng, options['likes_per_idea'], options['alpha'], len(user_ids))
+                for user_id in rng.sample(user_ids, like_count):
+                    likes.append(Like(idea_id=idea.pk, user_id=user_id))
+                comment_count = self.power_law(rng, options['comments_per_idea'], options['alpha'], 10_000)
+                for _ in range(comment_count):
+                    comments.append(Comment(idea_id=idea.pk, commenter_id=rng.choice(user_ids),
+                                            content=rng.choice(COMMENTS)))
+            Like.objects.bulk_create(likes, batch_size=options['chunk_size'])
+            Comment.objects.bulk_create(comments, batch_size=options['chunk_size'])
+        return {'ideas': len(ideas), 'likes': len(likes), 'comments': len(comments)}
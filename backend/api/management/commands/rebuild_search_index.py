@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over idea titles and descriptions (and its triggers)'
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Full-text search indexing needs the SQLite backend')
+        recreated = rebuild_index()
+        if recreated:
+            self.stdout.write(self.style.WARNING(f'Recreated missing trigger(s): {", ".join(recreated)}'))
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
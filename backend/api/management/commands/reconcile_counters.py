@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from api.models import Comment, Idea, Like
+
+
+def _count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(idea=OuterRef('pk'))
+            .order_by()
+            .values('idea')
+            .annotate(total=Count('*'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def _last_activity():
+    newest = Comment.objects.filter(idea=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    return Coalesce(Subquery(newest), F('created_at'))
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized idea columns that have drifted from the underlying rows (also backfills them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted ideas without fixing them')
+
+    def handle(self, *args, **options):
+        columns = {
+            'likes_count': _count(Like),
+            'comments_count': _count(Comment),
+            'last_activity_at': _last_activity(),
+        }
+        for field, actual in columns.items():
+            drifted = Idea.objects.annotate(actual=actual).exclude(**{field: F('actual')})
+
+            if options['dry_run']:
+                count = drifted.count()
+                self.stdout.write(f'{count} idea(s) have a drifted {field}')
+                continue
+
+            # One UPDATE statement fixes every drifted row; ideas whose column
+            # is already right are left alone.
+            count = Idea.objects.filter(pk__in=drifted.values('pk')).update(**{field: actual})
+            self.stdout.write(self.style.SUCCESS(f'Reconciled {field} on {count} idea(s)'))
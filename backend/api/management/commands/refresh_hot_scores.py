@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.conditional import bump_idea_version
+from api.models import Idea
+
+
+class Command(BaseCommand):
+    help = 'Recompute the time-decayed hot_score of every idea (run periodically, e.g. every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Ideas scored and written per UPDATE')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = Idea.objects.refresh_hot_scores(batch_size=options['batch_size'])
+        # Hot-ordered lists change even though no idea was edited
+        bump_idea_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed hot_score on {count} idea(s) in {time.perf_counter() - started:.1f}s'
+        ))
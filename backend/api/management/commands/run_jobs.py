@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued follow-up jobs (keep one or more running next to the web server)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed per batch')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when there is nothing to do')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            ran = jobs.run_batch(options['batch_size'])
+            total += ran
+            if ran:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Ran a batch of {ran} job(s)')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} job(s)'))
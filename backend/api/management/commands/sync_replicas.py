@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.db import PRIMARY, replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto the local replica stand-ins'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep copying every INTERVAL seconds instead of copying once')
+
+    def handle(self, *args, **options):
+        primary = connections[PRIMARY].settings_dict
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('No replicas configured (DATABASE_REPLICATION["REPLICAS"])')
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Only SQLite stand-ins can be synced; use the database\'s own replication')
+
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                self.copy(str(primary['NAME']), str(connections[alias].settings_dict['NAME']))
+                self.stdout.write(f'Synced {alias} in {time.perf_counter() - started:.2f}s')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_path, target_path):
+        # The online backup API takes a consistent snapshot while the
+        # primary keeps serving writes
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path, timeout=20)
+        try:
+            source.backup(target)
+            target.execute('PRAGMA journal_mode=WAL')
+        finally:
+            target.close()
+            source.close()
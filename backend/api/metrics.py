@@ -0,0 +1,258 @@
+"""
+Per-request instrumentation and a Prometheus metrics endpoint.
+
+:class:`MetricsMiddleware` measures every request and files the numbers
+under the view that handled it (``IdeaViewSet.like``, ``TopIdeasView``,
+``idea_detail``, ...):
+
+* wall time, from the first middleware to the rendered response
+* database time and query count, from an execute wrapper installed on every
+  connection as it is opened
+* serialization time, spent rendering the response data to bytes
+* response size in bytes
+
+Each response carries the numbers in a ``Server-Timing`` header so they show
+up in the browser's network panel. Aggregated histograms are served in the
+Prometheus text format by :func:`metrics_view`. Histograms live in process
+memory, so with several server processes every process has to be scraped.
+
+Recording costs a context variable lookup and a clock read per query plus a
+few bisects under a lock per request, which is cheap enough to leave on.
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = contextvars.ContextVar('api_request_stats', default=None)
+
+
+def _settings():
+    return getattr(settings, 'METRICS', {})
+
+
+class RequestStats:
+    """Numbers collected while one request is handled."""
+
+    __slots__ = ('started', 'db_time', 'queries', 'render_started', 'render_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.render_started = None
+        self.render_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver, connected in ApiConfig.ready()."""
+    # connection_created fires on every (re)connect of the same wrapper
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Request counters and per-view histograms for this process."""
+
+    HISTOGRAMS = (
+        ('api_request_duration_seconds', 'Wall time per request', DURATION_BUCKETS),
+        ('api_db_duration_seconds', 'Database time per request', DURATION_BUCKETS),
+        ('api_db_queries', 'Database queries per request', QUERY_BUCKETS),
+        ('api_serialize_duration_seconds', 'Response rendering time per request', DURATION_BUCKETS),
+        ('api_response_bytes', 'Response body size', SIZE_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.histograms = {}
+        self.collectors = []
+
+    def add_collector(self, collect):
+        """Add ``collect()``, returning extra exposition lines, to every render."""
+        self.collectors.append(collect)
+
+    def observe(self, view, method, status, values):
+        with self.lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histograms = self.histograms.get(view)
+            if histograms is None:
+                histograms = self.histograms[view] = [Histogram(buckets) for _, _, buckets in self.HISTOGRAMS]
+            for histogram, value in zip(histograms, values):
+                if value is not None:
+                    histogram.observe(value)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = [
+            '# HELP api_requests_total Requests handled, by view, method and status',
+            '# TYPE api_requests_total counter',
+        ]
+        with self.lock:
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'api_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}'
+                )
+            for index, (name, description, buckets) in enumerate(self.HISTOGRAMS):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histograms in sorted(self.histograms.items()):
+                    histogram = histograms[index]
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+        for collect in self.collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.requests.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+
+# Anything else a client sends is counted as 'other', so it can't add series
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+def method_label(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+@lru_cache(maxsize=1024)
+def _label_for(func, method):
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return func.__name__
+    # DRF viewsets map HTTP methods to actions (list, retrieve, like, ...)
+    actions = getattr(func, 'actions', None)
+    if actions and method.lower() in actions:
+        return f'{view_class.__name__}.{actions[method.lower()]}'
+    return view_class.__name__
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return _label_for(match.func, method_label(request))
+
+
+class MetricsMiddleware:
+    """Time every request and report it in Server-Timing and the registry."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        options = _settings()
+        self.enabled = options.get('ENABLED', True)
+        self.server_timing = options.get('SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook returns
+        stats = _current.get()
+        if stats is not None:
+            stats.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self.rendered(stats))
+        return response
+
+    def rendered(self, stats):
+        stats.render_time = time.perf_counter() - stats.render_started
+
+    def finish(self, request, response, stats):
+        wall = time.perf_counter() - stats.started
+        size = None if response.streaming else len(response.content)
+        registry.observe(
+            view_label(request),
+            method_label(request),
+            response.status_code,
+            (wall, stats.db_time, stats.queries, stats.render_time, size),
+        )
+        if self.server_timing:
+            app = max(wall - stats.db_time - stats.render_time, 0.0)
+            response['Server-Timing'] = (
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                f'serialize;dur={stats.render_time * 1000:.2f}, '
+                f'app;dur={app * 1000:.2f}, '
+                f'total;dur={wall * 1000:.2f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """Serve the registry to Prometheus; allowed IPs and staff users only."""
+    allowed = _settings().get('ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if request.META.get('REMOTE_ADDR') not in allowed and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['idea', '-created_at', '-id'], name='comment_idea_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-likes_count', '-created_at', '-id'], name='idea_likes_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+INDEX_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_idea_fts USING fts5(
+        title, description, content='api_idea', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+"""
+
+# The one definition of the triggers that keep the index in step; api/search.py
+# checks for and recreates them by name
+TRIGGERS = {
+    'api_idea_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS api_idea_fts_insert AFTER INSERT ON api_idea BEGIN
+            INSERT INTO api_idea_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    'api_idea_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS api_idea_fts_delete AFTER DELETE ON api_idea BEGIN
+            INSERT INTO api_idea_fts(api_idea_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    # Only text edits touch the index; likes_count updates skip it
+    'api_idea_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS api_idea_fts_update AFTER UPDATE OF title, description ON api_idea BEGIN
+            INSERT INTO api_idea_fts(api_idea_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO api_idea_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+REBUILD_SQL = "INSERT INTO api_idea_fts(api_idea_fts) VALUES('rebuild')"
+
+CREATE_SQL = [INDEX_SQL, *TRIGGERS.values(), REBUILD_SQL]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS api_idea_fts_update',
+    'DROP TRIGGER IF EXISTS api_idea_fts_delete',
+    'DROP TRIGGER IF EXISTS api_idea_fts_insert',
+    'DROP TABLE IF EXISTS api_idea_fts',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        # FTS5 is SQLite-only; other backends use the icontains fallback
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+import api.models
+
+
+def score_existing_ideas(apps, schema_editor):
+    # Same formula as IdeaQuerySet.refresh_hot_scores, restated against the
+    # historical model; `manage.py refresh_hot_scores` keeps it current.
+    Idea = apps.get_model('api', 'Idea')
+    options = getattr(settings, 'HOT_RANKING', {})
+    gravity = options.get('GRAVITY', 1.8)
+    comment_weight = options.get('COMMENT_WEIGHT', 2.0)
+    now = timezone.now()
+
+    def score(pk, likes_count, num_comments, created_at):
+        age_hours = max((now - created_at).total_seconds(), 0) / 3600
+        decay = 1 / (age_hours + 2) ** gravity
+        return (likes_count + comment_weight * num_comments) * decay, decay, pk
+
+    ideas = Idea.objects.using(schema_editor.connection.alias)
+    rows = ideas.order_by('pk').annotate(num_comments=Count('comments')).values_list(
+        'pk', 'likes_count', 'num_comments', 'created_at'
+    )
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:1000])
+        if not batch:
+            break
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'UPDATE api_idea SET hot_score = %s, hot_decay = %s WHERE id = %s',
+                [score(*row) for row in batch],
+            )
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_idea_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='hot_decay',
+            field=models.FloatField(default=api.models.new_idea_hot_decay),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-hot_score', '-id'], name='idea_hot_idx'),
+        ),
+        migrations.RunPython(score_existing_ideas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:47
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def backfill(apps, schema_editor):
+    # Same expressions as `manage.py reconcile_counters`, which repairs any
+    # later drift; one UPDATE over every idea
+    Idea = apps.get_model('api', 'Idea')
+    Comment = apps.get_model('api', 'Comment')
+    using = schema_editor.connection.alias
+    comments = Comment.objects.using(using).filter(idea=OuterRef('pk')).order_by()
+    Idea.objects.using(using).update(
+        comments_count=Coalesce(
+            Subquery(comments.values('idea').annotate(total=Count('*')).values('total')), Value(0)
+        ),
+        last_activity_at=Coalesce(
+            Subquery(comments.order_by('-created_at').values('created_at')[:1]), F('created_at')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='idea_active_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
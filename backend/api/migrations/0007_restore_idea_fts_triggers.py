@@ -0,0 +1,19 @@
+import importlib
+
+from django.db import migrations
+
+# SQLite rebuilds api_idea for some schema changes (0004 and 0006 both do),
+# which drops the triggers that keep the search index in step. Put them back
+# and reindex whatever was written while they were missing.
+idea_fts = importlib.import_module('api.migrations.0003_idea_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_idea_comments_count_last_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(idea_fts.run(idea_fts.CREATE_SQL), migrations.RunPython.noop),
+    ]
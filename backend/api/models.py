@@ -1,7 +1,139 @@
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
 
+from .pagination import COMMENTS_PAGE_SIZE
+
+
+def _hot_ranking():
+    return getattr(settings, 'HOT_RANKING', {})
+
+
+def comment_weight():
+    return _hot_ranking().get('COMMENT_WEIGHT', 2.0)
+
+
+def hot_decay(created_at, now):
+    """
+    Weight of one like on an idea's trending score at ``now``. This is the
+    Hacker News gravity formula, score = points / (age_hours + 2) ** gravity,
+    so fresh activity outranks old totals.
+    """
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return 1 / (age_hours + 2) ** _hot_ranking().get('GRAVITY', 1.8)
+
+
+def new_idea_hot_decay():
+    now = timezone.now()
+    return hot_decay(now, now)
+
+class IdeaQuerySet(models.QuerySet):
+    def with_related(self, comments_limit=COMMENTS_PAGE_SIZE):
+        # Pitchers are joined in and the newest page of comments for every
+        # idea (with commenters) comes back in one extra query. One row past
+        # the limit is fetched so callers can tell whether more exist.
+        return self.select_related('pitcher').prefetch_related(
+            models.Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('commenter').order_by('-created_at', '-id')[:comments_limit + 1],
+                to_attr='first_comments',
+            )
+        ).order_by(*self.model._meta.ordering)
+
+    def with_summary(self):
+        # The compact list form only needs the pitcher's name and the
+        # denormalized comments_count, never the comment rows themselves
+        return self.select_related('pitcher').order_by(*self.model._meta.ordering)
+
+    def adjust_likes_count(self, idea_id, delta):
+        """
+        Atomically add ``delta`` to an idea's likes_count (and the matching
+        amount to its hot_score) and return the new count, or None when the
+        backend cannot report it in the same statement. Every other column
+        (updated_at included) is left untouched.
+        """
+        if connection.vendor == 'postgresql' or (
+            connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+        ):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {self.model._meta.db_table} SET likes_count = likes_count + %s, '
+                    f'hot_score = hot_score + %s * hot_decay WHERE id = %s RETURNING likes_count',
+                    [delta, delta, idea_id],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+        self.filter(pk=idea_id).update(
+            likes_count=F('likes_count') + delta,
+            hot_score=F('hot_score') + delta * F('hot_decay'),
+        )
+        return None
+
+    def adjust_comments_count(self, idea_id, delta, activity_at=None):
+        """
+        Atomically add ``delta`` to an idea's comments_count. A new comment
+        moves last_activity_at forward to ``activity_at``; a removed one sets
+        it back to the newest remaining comment (or the idea's creation).
+        """
+        if delta > 0:
+            last_activity_at = Greatest(F('last_activity_at'), Value(activity_at, output_field=models.DateTimeField()))
+        else:
+            newest = Comment.objects.filter(idea=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+            last_activity_at = Coalesce(Subquery(newest), F('created_at'))
+        self.filter(pk=idea_id).update(comments_count=F('comments_count') + delta, last_activity_at=last_activity_at)
+
+    def refresh_hot_scores(self, batch_size=None):
+        """
+        Recompute hot_decay and hot_score for every idea in this queryset as
+        of now, walking it in primary key order one batch at a time. Each
+        batch is scored in one pass and written with a single prepared UPDATE
+        run over all its rows. Returns the number of ideas updated.
+        """
+        batch_size = batch_size or _hot_ranking().get('BATCH_SIZE', 1000)
+        weight = comment_weight()
+        now = timezone.now()
+        queryset = self.order_by('pk')
+        updated, last_pk = 0, 0
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .values_list('pk', 'likes_count', 'comments_count', 'created_at')[:batch_size]
+            )
+            if not rows:
+                return updated
+            params = []
+            for pk, likes_count, comments_count, created_at in rows:
+                decay = hot_decay(created_at, now)
+                params.append(((likes_count + weight * comments_count) * decay, decay, pk))
+            # Far cheaper than bulk_update's CASE WHEN on large batches
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {self.model._meta.db_table} SET hot_score = %s, hot_decay = %s WHERE id = %s', params
+                )
+            updated += len(params)
+            last_pk = rows[-1][0]
+
+class CreationTimeDefaultField(models.DateTimeField):
+    """
+    A DateTimeField that takes the row's ``created_at`` on insert, so both
+    hold the same instant. created_at's auto_now_add reads the clock while
+    the INSERT is built, too late for Model.save() to copy it. Migrations
+    see a plain DateTimeField since the column is unchanged.
+    """
+    
+    def pre_save(self, model_instance, add):
+        if add:
+            setattr(model_instance, self.attname, model_instance.created_at)
+        return super().pre_save(model_instance, add)
+    
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.DateTimeField', args, kwargs
+
 class Idea(models.Model):
     title = models.CharField(max_length=200, validators=[MinLengthValidator(10)])
     description = models.TextField(validators=[MinLengthValidator(50)])
@@ -9,9 +141,26 @@ class Idea(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     likes_count = models.IntegerField(default=0)
+    # Maintained by Comment.save()/delete(); reconcile_counters repairs drift
+    comments_count = models.IntegerField(default=0)
+    # The newest of the idea's creation and its comments
+    last_activity_at = CreationTimeDefaultField(default=timezone.now)
+    # Time-decayed trending score: (likes + weighted comments) * hot_decay.
+    # A like adds hot_decay right away, comments are rescored by a queued job
+    # and refresh_hot_scores() periodically recomputes both as the idea ages.
+    hot_score = models.FloatField(default=0)
+    hot_decay = models.FloatField(default=new_idea_hot_decay)
+    
+    objects = IdeaQuerySet.as_manager()
     
     class Meta:
         ordering = ['-likes_count', '-created_at']
+        indexes = [
+            # Serves both the default ordering and keyset pagination seeks
+            models.Index(fields=['-likes_count', '-created_at', '-id'], name='idea_likes_recent_idx'),
+            models.Index(fields=['-hot_score', '-id'], name='idea_hot_idx'),
+            models.Index(fields=['-last_activity_at', '-id'], name='idea_active_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -24,15 +173,106 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['idea', '-created_at', '-id'], name='comment_idea_recent_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.commenter.username} on {self.idea.title}'
+    
+    def save(self, *args, **kwargs):
+        # The idea's comments_count and last_activity_at commit with the row
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Idea.objects.adjust_comments_count(self.idea_id, 1, self.created_at)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Idea.objects.adjust_comments_count(self.idea_id, -1)
+        return result
+
+class LikeQuerySet(models.QuerySet):
+    def toggle(self, user, idea_id):
+        """
+        Like or unlike an idea for a user. Returns ``(liked, likes_count)``
+        where likes_count is the idea's new count, or None if it is unknown.
+        """
+        likes_count = None
+        with transaction.atomic():
+            # A conflict-aware insert decides the toggle in one statement:
+            # either the row is new or the user already liked the idea.
+            table = Like._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, idea_id, created_at) VALUES (%s, %s, %s) '
+                    f'ON CONFLICT (user_id, idea_id) DO NOTHING',
+                    [user.pk, idea_id, connection.ops.adapt_datetimefield_value(timezone.now())],
+                )
+                liked = cursor.rowcount == 1
+            if liked:
+                likes_count = Idea.objects.adjust_likes_count(idea_id, 1)
+            else:
+                deleted, _ = self.filter(user=user, idea_id=idea_id).delete()
+                if deleted:
+                    likes_count = Idea.objects.adjust_likes_count(idea_id, -1)
+        return liked, likes_count
+
+    def apply_states(self, states, chunk_size=400):
+        """
+        Bring likes in line with a ``{(user_id, idea_id): liked}`` mapping in
+        one transaction, adjusting likes_count by the net change per idea.
+        """
+        pairs = list(states)
+        with transaction.atomic():
+            idea_ids = set(Idea.objects.filter(pk__in={i for _, i in pairs}).values_list('pk', flat=True))
+            user_ids = set(User.objects.filter(pk__in={u for u, _ in pairs}).values_list('pk', flat=True))
+            to_create, to_delete = [], []
+            for start in range(0, len(pairs), chunk_size):
+                chunk = [(u, i) for u, i in pairs[start:start + chunk_size] if u in user_ids and i in idea_ids]
+                existing = set(
+                    self.filter(user_id__in={u for u, _ in chunk}, idea_id__in={i for _, i in chunk})
+                    .values_list('user_id', 'idea_id')
+                )
+                for pair in chunk:
+                    if states[pair] and pair not in existing:
+                        to_create.append(Like(user_id=pair[0], idea_id=pair[1]))
+                    elif not states[pair] and pair in existing:
+                        to_delete.append(pair)
+
+            self.bulk_create(to_create, batch_size=chunk_size, ignore_conflicts=True)
+            for start in range(0, len(to_delete), chunk_size):
+                condition = Q()
+                for user_id, idea_id in to_delete[start:start + chunk_size]:
+                    condition |= Q(user_id=user_id, idea_id=idea_id)
+                self.filter(condition).delete()
+
+            deltas = {}
+            for like in to_create:
+                deltas[like.idea_id] = deltas.get(like.idea_id, 0) + 1
+            for _, idea_id in to_delete:
+                deltas[idea_id] = deltas.get(idea_id, 0) - 1
+            # One UPDATE per distinct delta rather than one per idea
+            by_delta = {}
+            for idea_id, delta in deltas.items():
+                if delta:
+                    by_delta.setdefault(delta, []).append(idea_id)
+            for delta, ids in by_delta.items():
+                Idea.objects.filter(pk__in=ids).update(
+                    likes_count=F('likes_count') + delta,
+                    hot_score=F('hot_score') + delta * F('hot_decay'),
+                )
+        return len(to_create) + len(to_delete)
 
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='likes')
     idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='likes')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = LikeQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'idea']
     
@@ -40,13 +280,44 @@ class Like(models.Model):
         return f'{self.user.username} likes {self.idea.title}'
     
     def save(self, *args, **kwargs):
-        # Update likes count when saving
+        # Update likes count when a new like is saved
+        adding = self._state.adding
         super().save(*args, **kwargs)
-        self.idea.likes_count = self.idea.likes.count()
-        self.idea.save()
+        if adding:
+            Idea.objects.adjust_likes_count(self.idea_id, 1)
     
     def delete(self, *args, **kwargs):
         # Update likes count when deleting
-        super().delete(*args, **kwargs)
-        self.idea.likes_count = self.idea.likes.count()
-        self.idea.save() 
\ No newline at end of file
+        result = super().delete(*args, **kwargs)
+        Idea.objects.adjust_likes_count(self.idea_id, -1)
+        return result
+
+class Job(models.Model):
+    """A unit of deferred follow-up work, run by `manage.py run_jobs` (see api/jobs.py)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+    
+    kind = models.CharField(max_length=100)
+    # At most one pending job per key; enqueueing a duplicate is a no-op
+    key = models.CharField(max_length=200, null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='job_ready_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=Q(status='pending'), name='job_pending_key_uniq'),
+        ]
+    
+    def __str__(self):
+        return f'{self.kind} ({self.status})'
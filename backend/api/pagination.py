@@ -0,0 +1,176 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek-based pagination over a fixed composite ordering.
+
+    The cursor is an opaque token holding the sort key of the last row on the
+    page, and the next page is fetched with a ``WHERE (key) < (cursor)``
+    condition that the matching composite index can answer directly, so deep
+    pages cost the same as the first one. The ordering must end in a unique
+    field (``id``) to break ties.
+    """
+    cursor_query_param = 'cursor'
+    page_size = None
+    ordering = ('-id',)
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = ordering
+        if page_size is not None:
+            self.page_size = page_size
+        if self.page_size is None:
+            self.page_size = PageNumberPagination.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """
+        Return the unevaluated queryset for the requested page. It holds one
+        extra row so ``set_page`` can tell whether there is a next page.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        queryset = queryset.order_by(*self.ordering)
+
+        query_params = getattr(request, 'query_params', request.GET)
+        token = query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self._seek(queryset.model, self.decode_cursor(token)))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def _seek(self, model, values):
+        # Expand the row comparison into OR-ed prefixes:
+        # a < x  OR  (a = x AND b < y)  OR  (a = x AND b = y AND c < z) ...
+        # plus a redundant a <= x bound that lets the index seek instead of
+        # scanning from the start.
+        conditions = []
+        equal = {}
+        for field_name, value in zip(self.ordering, values):
+            name = field_name.lstrip('-')
+            lookup = 'lt' if field_name.startswith('-') else 'gt'
+            value = self._to_python(model, name, value)
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        first_name = self.ordering[0].lstrip('-')
+        first_lookup = 'lte' if self.ordering[0].startswith('-') else 'gte'
+        return Q(**{f'{first_name}__{first_lookup}': equal[first_name]}) & reduce(or_, conditions)
+
+    @staticmethod
+    def _to_python(model, name, value):
+        # A cursor that decodes but was tampered with is as invalid as one that doesn't
+        if value is None:
+            raise NotFound('Invalid cursor')
+        try:
+            value = model._meta.get_field(name).clean(value, None)
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            raise NotFound('Invalid cursor')
+        # Not every backend has range validators; no stored key is wider than 64 bits
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            raise NotFound('Invalid cursor')
+        return value
+
+    def encode_cursor(self, obj):
+        values = []
+        for field_name in self.ordering:
+            value = getattr(obj, field_name.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    Page-number pagination by default; keyset pagination when the request
+    carries a ``cursor`` parameter (an empty value asks for the first page).
+    """
+    cursor_ordering = ('-id',)
+
+    def get_cursor_ordering(self, request):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.paginator = KeysetPagination(ordering=self.get_cursor_ordering(request))
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+
+class IdeaPagination(CursorOrPageNumberPagination):
+    cursor_ordering = ('-likes_count', '-created_at', '-id')
+    # ``?ordering=hot`` ranks by the precomputed trending score instead and
+    # ``?ordering=active`` by the latest comment; each has a matching index
+    ordering_query_param = 'ordering'
+    orderings = {
+        'top': cursor_ordering,
+        'hot': ('-hot_score', '-id'),
+        'active': ('-last_activity_at', '-id'),
+    }
+
+    @classmethod
+    def get_ordering(cls, query_params):
+        return cls.orderings.get(query_params.get(cls.ordering_query_param), cls.cursor_ordering)
+
+    def get_cursor_ordering(self, request):
+        return self.get_ordering(request.query_params)
+
+
+COMMENTS_PAGE_SIZE = 20
+
+
+class CommentPagination(KeysetPagination):
+    """Comments are always paged newest first by cursor."""
+    ordering = ('-created_at', '-id')
+    page_size = COMMENTS_PAGE_SIZE
@@ -0,0 +1,131 @@
+"""
+Password hashing on a bounded process pool.
+
+PBKDF2 is deliberately slow, and running it on the request worker holds the
+GIL for the whole hash, so a burst of logins stalls every other request the
+process is serving. Login and registration hand their hashes to a small pool
+of worker processes instead. The request thread just waits, leaving the CPU
+to the rest of the traffic.
+
+At most ``PASSWORD_HASHING['MAX_PENDING']`` hashes may be queued or running
+per server process; beyond that :class:`HashingBusy` is raised and the view
+answers 503 with ``Retry-After``. ``WORKERS: 0`` hashes inline on the
+request thread, as Django does by default.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_login_failed
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued in this process."""
+
+
+class PasswordHashingPool:
+    """Run password hashers in worker processes, with a bounded backlog."""
+
+    def __init__(self, workers=2, max_pending=16, timeout=10):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            # Forking a threaded server process is unsafe; spawned workers
+            # only need DJANGO_SETTINGS_MODULE to find PASSWORD_HASHERS
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self.executor
+
+    def _release(self, future=None):
+        with self.lock:
+            self.pending -= 1
+
+    def run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise HashingBusy()
+            self.pending += 1
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died; replace the pool and retry once
+                self.executor = None
+                try:
+                    future = self._get_executor().submit(fn, *args)
+                except Exception:
+                    self.pending -= 1
+                    raise
+        # A hash that times out keeps its slot until the worker finishes it
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy()
+        except BrokenProcessPool:
+            with self.lock:
+                self.executor = None
+            raise HashingBusy()
+
+    def make_password(self, password):
+        return self.run(make_password, password)
+
+    def check_password(self, password, encoded):
+        return self.run(check_password, password, encoded)
+
+
+def get_password_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                options = getattr(settings, 'PASSWORD_HASHING', {})
+                _pool = PasswordHashingPool(
+                    workers=options.get('WORKERS', 2),
+                    max_pending=options.get('MAX_PENDING', 16),
+                    timeout=options.get('TIMEOUT', 10),
+                )
+    return _pool
+
+
+def authenticate_user(request, username, password):
+    """
+    Check a username and password like ``ModelBackend`` does, with the hash
+    computed on the pool. Returns the user, or None for bad credentials.
+    """
+    pool = get_password_pool()
+    UserModel = get_user_model()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # Hash anyway so unknown usernames take as long as wrong passwords
+        pool.make_password(password)
+        user = None
+    else:
+        if not pool.check_password(password, user.password) or not user.is_active:
+            user = None
+
+    if user is None:
+        user_login_failed.send(sender=__name__, credentials={'username': username}, request=request)
+        return None
+
+    # Rehash with the current hasher or iteration count, as check_password's
+    # setter would
+    hasher = identify_hasher(user.password)
+    if hasher.algorithm != get_hasher('default').algorithm or hasher.must_update(user.password):
+        user.password = pool.make_password(password)
+        user.save(update_fields=['password'])
+    return user
@@ -0,0 +1,194 @@
+"""
+Server push of idea updates over Server-Sent Events.
+
+Write paths publish small delta events (a new like count, a new comment) on
+per-idea channels (``idea:<id>``) and on the ``leaderboard`` channel. The
+in-process :class:`Broker` fans each event out to the SSE streams (see
+api/streams.py) subscribed on that channel. How events travel between publishers and brokers is up to
+the configured backend:
+
+* :class:`LocalBackend` delivers in-process only, for a single ASGI server.
+* :class:`UnixSocketBackend` fans out to every server process on the machine
+  through datagram sockets in a shared directory. It is a local stand-in for
+  a real message bus.
+
+Each subscriber has a bounded queue. A consumer too slow to drain it has its
+backlog dropped and gets a single ``resync`` event, telling the client to
+refetch, so one slow client can't grow server memory without bound.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_CHANNEL = 'leaderboard'
+RESYNC = {'type': 'resync'}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def idea_channel(idea_id):
+    return f'idea:{idea_id}'
+
+
+class LocalBackend:
+    """Deliver events to subscribers in this process only."""
+
+    def __init__(self, **options):
+        self.deliver = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+
+class UnixSocketBackend:
+    """
+    Fan events out to every process that has a socket in ``PATH``.
+
+    Each process binds its own datagram socket in the directory and a
+    listener thread hands whatever arrives to the local broker. Publishing
+    sends one datagram to every socket there, this process's own included,
+    and removes sockets whose process has gone away.
+    """
+
+    def __init__(self, PATH, **options):
+        self.directory = str(PATH)
+        self.deliver = None
+        self.address = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+        os.makedirs(self.directory, exist_ok=True)
+        self.address = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self.address)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        threading.Thread(target=self._listen, name='realtime-listener', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            data = self._receiver.recv(65536)
+            try:
+                channel, event = json.loads(data)
+            except ValueError:
+                continue
+            self.deliver(channel, event)
+
+    def publish(self, channel, event):
+        data = json.dumps([channel, event]).encode()
+        for address in glob.glob(os.path.join(self.directory, '*.sock')):
+            try:
+                self._sender.sendto(data, address)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listens there any more
+                try:
+                    os.remove(address)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                # That process's receive buffer is full; it will resync
+                # its clients once it catches up.
+                logger.warning('Dropped realtime event for %s', address)
+
+
+class Subscription:
+    def __init__(self, broker, channel, queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def _push(self, event):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Return the next event, or None if nothing arrives within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class Broker:
+    def __init__(self, backend, queue_size=100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        backend.start(self._deliver)
+
+    def subscribe(self, channel):
+        """Subscribe the running event loop to a channel."""
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        """Publish an event; safe to call from any thread."""
+        try:
+            self.backend.publish(channel, event)
+        except Exception:
+            # Pushing updates is best effort and must never fail a write
+            logger.exception('Failed to publish realtime event on %s', channel)
+
+    def _deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self._unsubscribe(subscription)
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'REALTIME', {})
+                backend_class = import_string(config.get('BACKEND', 'api.realtime.LocalBackend'))
+                _broker = Broker(
+                    backend_class(**config.get('OPTIONS', {})),
+                    queue_size=config.get('QUEUE_SIZE', 100),
+                )
+    return _broker
+
+
+def publish(channel, event):
+    get_broker().publish(channel, event)
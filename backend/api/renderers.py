@@ -0,0 +1,120 @@
+"""
+JSON rendering and parsing backed by orjson.
+
+:class:`FastJSONRenderer` and :class:`FastJSONParser` are drop-in
+replacements for DRF's JSON renderer and parser. For the compact, UTF-8
+output the API is configured for, the renderer produces the same bytes as
+``JSONRenderer``: datetimes are encoded natively in the same ISO 8601 form
+(``Z`` for UTC), anything orjson doesn't know goes through DRF's
+``JSONEncoder``, and U+2028/U+2029 are escaped the same way. Indented
+output (``?indent=`` or an ``indent`` media type parameter) and payloads
+orjson refuses, such as integers wider than 64 bits, fall back to DRF.
+
+Two differences remain. NaN and infinity are refused by DRF with an error
+and encoded by orjson as ``null``. Floats that Python writes in exponent
+form come out with a different exponent (DRF gives ``1e+16`` and
+``1.5e-07``, orjson ``1e16`` and ``1.5e-7``). Finding floats costs more
+than encoding, so :func:`dumps` doesn't look; the API payloads hold none,
+and export rows, which do, go through :func:`dumps_flat`.
+Without orjson installed both classes behave exactly like DRF's.
+
+:class:`NDJSONRenderer` and :class:`CSVRenderer` let the export view
+negotiate its format (see api/export.py).
+"""
+
+import csv
+from io import BytesIO, StringIO
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+_encoder = JSONEncoder()
+_stdlib_renderer = JSONRenderer()
+
+
+def dumps(data):
+    """Encode ``data`` exactly like the API's default JSONRenderer would."""
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+        except TypeError:
+            pass
+        else:
+            if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+                content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+            return content
+    return _stdlib_renderer.render(data)
+
+
+def dumps_flat(data):
+    """
+    :func:`dumps` for a flat dict that may hold floats, such as an export
+    row. A float Python writes in exponent form sends it through DRF.
+    """
+    if any(type(value) is float and 'e' in repr(value) for value in data.values()):
+        return _stdlib_renderer.render(data)
+    return dumps(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let DRF decide, so accepted input and error messages match it
+            return super().parse(BytesIO(body), media_type, parser_context)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """One JSON document per line; a list is rendered as one line per item."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(dumps(item) + b'\n' for item in items)
+
+
+class CSVRenderer(BaseRenderer):
+    """A flat dict, or a list of flat dicts, as a header row plus data rows."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        buffer = StringIO()
+        writer = csv.DictWriter(buffer, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
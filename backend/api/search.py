@@ -0,0 +1,137 @@
+"""
+Ranked full-text search over idea titles and descriptions.
+
+On SQLite the ideas are indexed in the ``api_idea_fts`` FTS5 table (created in
+migration 0003), an external-content index over ``api_idea`` that triggers
+keep in step with every insert, update and delete. Other backends fall back to
+an unranked ``icontains`` filter.
+
+SQLite drops those triggers whenever a migration rebuilds ``api_idea``, after
+which the index silently stops seeing new and edited ideas. The ``api.W001``
+check (``manage.py check --database default``, also run by ``migrate``)
+reports that, and ``manage.py rebuild_search_index`` puts them back.
+"""
+
+import html
+import importlib
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Idea
+
+FTS_TABLE = 'api_idea_fts'
+# Title matches weigh more than description matches in the BM25 score
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'(\w+)(\*?)')
+
+# FTS5 wraps matches in these; they are swapped for <mark> tags once the text
+# around them is escaped
+_MARK_OPEN = '\x02'
+_MARK_CLOSE = '\x03'
+
+# Defined once, in the migration that creates the index (0007 reuses it too)
+TRIGGERS = importlib.import_module('api.migrations.0003_idea_fts').TRIGGERS
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 MATCH expression. Every word is quoted so
+    user input can't inject FTS syntax; a trailing ``*`` makes it a prefix
+    search. Returns an empty string if there is nothing to search for.
+    """
+    terms = []
+    for word, star in _TOKEN_RE.findall(text):
+        terms.append(f'"{word}"' + ('*' if star else ''))
+    return ' '.join(terms)
+
+
+def fts_available(using=None):
+    return connections[using or router.db_for_read(Idea)].vendor == 'sqlite'
+
+
+def missing_triggers(using=None):
+    """Return the names of index triggers absent from the database, in a stable order."""
+    with connections[using or router.db_for_write(Idea)].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        present = {row[0] for row in cursor.fetchall()}
+    return [name for name in TRIGGERS if name not in present]
+
+
+def index_exists(using=None):
+    connection = connections[using or router.db_for_write(Idea)]
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def _marked(text):
+    # Only the <mark> tags are markup; everything else is the idea's own text
+    return html.escape(text).replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def search_ideas(text, limit, offset=0):
+    """
+    Return ``(ideas, has_more)`` for one page of results, best match first.
+    Each idea carries ``title_highlight`` and ``snippet`` attributes: HTML
+    with the idea text escaped and matches wrapped in ``<mark>`` tags.
+    """
+    using = router.db_for_read(Idea)
+    if not fts_available(using):
+        return _search_fallback(text, limit, offset)
+
+    match = build_match_query(text)
+    if not match:
+        return [], False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, '
+            f'highlight({FTS_TABLE}, 0, %s, %s), '
+            f"snippet({FTS_TABLE}, 1, %s, %s, '…', 24) "
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s',
+            [_MARK_OPEN, _MARK_CLOSE, _MARK_OPEN, _MARK_CLOSE,
+             match, TITLE_WEIGHT, DESCRIPTION_WEIGHT, limit + 1, offset],
+        )
+        rows = cursor.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    ideas = Idea.objects.using(using).with_summary().in_bulk([row[0] for row in rows])
+    results = []
+    for idea_id, title_highlight, snippet in rows:
+        idea = ideas.get(idea_id)
+        if idea is None:
+            continue
+        idea.title_highlight = _marked(title_highlight)
+        idea.snippet = _marked(snippet)
+        results.append(idea)
+    return results, has_more
+
+
+def _search_fallback(text, limit, offset):
+    words = [word for word, _ in _TOKEN_RE.findall(text)]
+    if not words:
+        return [], False
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    ideas = list(Idea.objects.with_summary().filter(condition)[offset:offset + limit + 1])
+    for idea in ideas:
+        idea.title_highlight = html.escape(idea.title)
+        idea.snippet = html.escape(idea.description[:200])
+    return ideas[:limit], len(ideas) > limit
+
+
+def rebuild_index():
+    """
+    Recreate any missing index triggers and repopulate the FTS index from
+    the ideas table. Returns the names of the triggers it recreated.
+    """
+    missing = missing_triggers()
+    with connections[router.db_for_write(Idea)].cursor() as cursor:
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+    return missing
@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth.models import User
 
+from .like_buffer import get_like_buffer
 from .models import Idea, Comment, Like
+from .pagination import COMMENTS_PAGE_SIZE, CommentPagination
+from .passwords import get_password_pool
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,21 +22,134 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'content', 'commenter', 'created_at']
         read_only_fields = ['id', 'commenter', 'created_at']
 
-class IdeaSerializer(serializers.ModelSerializer):
+def _with_pending_likes(user, liked_idea_ids):
+    like_buffer = get_like_buffer()
+    if like_buffer is not None:
+        # Layer the user's own not-yet-flushed toggles on top
+        for idea_id, liked in like_buffer.pending_for_user(user.pk).items():
+            if liked:
+                liked_idea_ids.add(idea_id)
+            else:
+                liked_idea_ids.discard(idea_id)
+    return liked_idea_ids
+
+def get_liked_idea_ids(user, idea_ids):
+    """Return the subset of ``idea_ids`` the user likes, in a single query."""
+    liked_idea_ids = set(
+        Like.objects.filter(user=user, idea_id__in=idea_ids).values_list('idea_id', flat=True)
+    )
+    return _with_pending_likes(user, liked_idea_ids)
+
+async def aget_liked_idea_ids(user, idea_ids):
+    """Async version of :func:`get_liked_idea_ids`."""
+    liked_idea_ids = {
+        idea_id async for idea_id in
+        Like.objects.filter(user=user, idea_id__in=idea_ids).values_list('idea_id', flat=True)
+    }
+    return _with_pending_likes(user, liked_idea_ids)
+
+class IdeaListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        ideas = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        # Callers may resolve is_liked up front (the async views do)
+        resolved = 'liked_idea_ids' in self.context
+        if not resolved and request and request.user.is_authenticated and 'is_liked' in self.child.fields:
+            # Resolve is_liked for the whole page with a single query
+            self.context['liked_idea_ids'] = get_liked_idea_ids(request.user, [idea.id for idea in ideas])
+        return super().to_representation(ideas)
+
+class LikedStateMixin:
+    def get_is_liked(self, obj):
+        liked_idea_ids = self.context.get('liked_idea_ids')
+        if liked_idea_ids is not None:
+            return obj.id in liked_idea_ids
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            like_buffer = get_like_buffer()
+            if like_buffer is not None:
+                pending = like_buffer.pending_state(request.user.pk, obj.id)
+                if pending is not None:
+                    return pending
+            return obj.likes.filter(user=request.user).exists()
+        return False
+
+class SparseFieldsetMixin:
+    """Lets clients pick a subset of fields with ``?fields=id,title,...``."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = getattr(request, 'query_params', getattr(request, 'GET', {})).get('fields') if request else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+class IdeaSerializer(LikedStateMixin, serializers.ModelSerializer):
+    """
+    Full idea. Only the newest page of comments is embedded; ``comments_next``
+    links to the comments endpoint for the rest.
+    """
     pitcher = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Idea
-        fields = ['id', 'title', 'description', 'pitcher', 'created_at', 'updated_at', 'likes_count', 'comments', 'is_liked']
-        read_only_fields = ['id', 'pitcher', 'created_at', 'updated_at', 'likes_count', 'is_liked']
+        fields = ['id', 'title', 'description', 'pitcher', 'created_at', 'updated_at', 'likes_count',
+                  'comments', 'comments_count', 'comments_next', 'is_liked']
+        read_only_fields = ['id', 'pitcher', 'created_at', 'updated_at', 'likes_count', 'comments_count', 'is_liked']
+        list_serializer_class = IdeaListSerializer
     
-    def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
-        return False
+    def _first_comments(self, obj):
+        # Prefetched by IdeaQuerySet.with_related(), one row past the page
+        if not hasattr(obj, 'first_comments'):
+            obj.first_comments = list(
+                obj.comments.select_related('commenter').order_by('-created_at', '-id')[:COMMENTS_PAGE_SIZE + 1]
+            )
+        return obj.first_comments
+    
+    def get_comments(self, obj):
+        return CommentSerializer(self._first_comments(obj)[:COMMENTS_PAGE_SIZE], many=True).data
+    
+    def get_comments_next(self, obj):
+        comments = self._first_comments(obj)
+        if len(comments) <= COMMENTS_PAGE_SIZE:
+            return None
+        cursor = CommentPagination().encode_cursor(comments[COMMENTS_PAGE_SIZE - 1])
+        url = reverse('idea-comments', kwargs={'pk': obj.pk}, request=self.context.get('request'))
+        return replace_query_param(url, CommentPagination.cursor_query_param, cursor)
+
+class PitcherSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+class IdeaSummarySerializer(SparseFieldsetMixin, LikedStateMixin, serializers.ModelSerializer):
+    """Compact idea card used by list endpoints; the full form is on retrieve."""
+    DESCRIPTION_LENGTH = 150
+    
+    pitcher = PitcherSummarySerializer(read_only=True)
+    description = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Idea
+        fields = ['id', 'title', 'description', 'pitcher', 'created_at', 'updated_at', 'likes_count', 'comments_count', 'is_liked']
+        list_serializer_class = IdeaListSerializer
+    
+    def get_description(self, obj):
+        if len(obj.description) <= self.DESCRIPTION_LENGTH:
+            return obj.description
+        return obj.description[:self.DESCRIPTION_LENGTH] + '...'
+
+class IdeaSearchResultSerializer(IdeaSummarySerializer):
+    title_highlight = serializers.CharField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    
+    class Meta(IdeaSummarySerializer.Meta):
+        fields = IdeaSummarySerializer.Meta.fields + ['title_highlight', 'snippet']
 
 class IdeaCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -59,5 +177,11 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # Same as create_user, with the hash computed off the request thread
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = get_password_pool().make_password(password)
+        user.save()
         return user 
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Server-Sent Event streams at /api/stream/, served outside Django's handler.
+
+Django 4.2 runs every ASGI request in its own ThreadSensitiveContext, so a
+streaming response from a Django view would hold a sync thread for as long
+as the stream stays open. :class:`StreamRouter` wraps the Django ASGI
+application (see startup_platform/asgi.py) and answers the stream paths
+itself: authentication and the idea lookup run in one short
+``sync_to_async`` call, and from then on an open stream is only a coroutine
+waiting on its subscription (see api/realtime.py). Idle subscribers cost
+memory, not threads. Every other request goes to Django unchanged.
+
+Streams end when the client disconnects or after
+``REALTIME['MAX_STREAM_SECONDS']``, after which EventSource reconnects and
+is authenticated again. They bypass Django's middleware, so they don't
+appear in /api/metrics/. Under WSGI the same paths answer 501.
+"""
+
+import asyncio
+import json
+import re
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import realtime, renderers
+from .authentication import CachedJWTAuthentication
+from .db import PRIMARY
+from .models import Idea
+
+IDEA_PATH = re.compile(r'^/api/stream/ideas/(?P<pk>[0-9]+)/$')
+LEADERBOARD_PATH = '/api/stream/leaderboard/'
+
+
+def _resolve(request, idea_id):
+    """
+    Check the request's credentials and that the idea exists. Returns None
+    to go ahead, or the (status, body) of an error response.
+    """
+    close_old_connections()
+    try:
+        # Streams are public, but a bad token is refused as everywhere else
+        CachedJWTAuthentication().authenticate(request)
+        # The primary, so a stream opened right after creating an idea finds it
+        if idea_id is not None and not Idea.objects.using(PRIMARY).filter(pk=idea_id).exists():
+            return 404, {'detail': 'Not found.'}
+    except APIException as exc:
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return exc.status_code, data
+    finally:
+        close_old_connections()
+    return None
+
+
+def _cors_headers(request):
+    # CorsMiddleware doesn't see these responses
+    origin = request.headers.get('Origin')
+    if origin is None or origin not in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+async def _send_json(send, status, data, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': renderers.dumps(data)})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _next_event(subscription, disconnected, timeout):
+    """The next event, or None after ``timeout`` seconds or on disconnect."""
+    getter = asyncio.ensure_future(subscription.queue.get())
+    await asyncio.wait((getter, disconnected), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if getter.done():
+        return getter.result()
+    getter.cancel()
+    return None
+
+
+async def event_stream(scope, receive, send, channel, idea_id=None):
+    request = ASGIRequest(scope, BytesIO())
+    cors = _cors_headers(request)
+    if request.method != 'GET':
+        await _send_json(send, 405, {'detail': f'Method "{request.method}" not allowed.'},
+                         [(b'allow', b'GET'), *cors])
+        return
+    error = await sync_to_async(_resolve, thread_sensitive=False)(request, idea_id)
+    if error is not None:
+        await _send_json(send, *error, cors)
+        return
+
+    config = getattr(settings, 'REALTIME', {})
+    heartbeat = config.get('HEARTBEAT', 15)
+    subscription = realtime.get_broker().subscribe(channel)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    loop = subscription.loop
+    deadline = loop.time() + config.get('MAX_STREAM_SECONDS', 300)
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while not disconnected.done() and loop.time() < deadline:
+            event = await _next_event(subscription, disconnected, min(heartbeat, max(deadline - loop.time(), 0)))
+            if disconnected.done():
+                break
+            if event is None:
+                chunk = ': keep-alive\n\n'
+            else:
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event, cls=JSONEncoder)}\n\n"
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        subscription.close()
+
+
+class StreamRouter:
+    """ASGI application serving the stream paths and passing the rest to ``application``."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            if scope['path'] == LEADERBOARD_PATH:
+                return await event_stream(scope, receive, send, realtime.LEADERBOARD_CHANNEL)
+            match = IDEA_PATH.match(scope['path'])
+            if match is not None:
+                idea_id = int(match['pk'])
+                return await event_stream(scope, receive, send, realtime.idea_channel(idea_id), idea_id)
+        return await self.application(scope, receive, send)
+
+
+def unavailable(request, *args, **kwargs):
+    """The stream paths under WSGI, which would hold a worker per stream."""
+    body = renderers.dumps({'detail': 'Event streams are only served by the ASGI application.'})
+    return HttpResponse(body, status=501, content_type='application/json')
@@ -0,0 +1,288 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import jobs
+from .like_buffer import LikeBuffer
+from .models import Comment, Idea, Job, Like
+from .pagination import IdeaPagination, KeysetPagination
+
+# Keep tests off the on-disk shared cache and the password-hashing pool
+TEST_SETTINGS = {
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+    },
+    'PASSWORD_HASHING': {'WORKERS': 0},
+    'THROTTLING': {'ENABLED': False},
+    'JOBS': {'ASYNC': True, 'BATCH_SIZE': 500, 'MAX_ATTEMPTS': 2, 'RETRY_DELAY': 5, 'LEASE': 60},
+}
+
+
+def cursor_for(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@override_settings(**TEST_SETTINGS)
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+        self.idea = Idea.objects.create(title='Idea', description='An idea', pitcher=self.users[0])
+
+    def assertCountsConsistent(self):
+        self.idea.refresh_from_db()
+        self.assertEqual(self.idea.likes_count, Like.objects.filter(idea=self.idea).count())
+
+    def test_toggle_likes_then_unlikes(self):
+        self.assertEqual(Like.objects.toggle(self.users[1], self.idea.pk), (True, 1))
+        self.assertEqual(Like.objects.toggle(self.users[1], self.idea.pk), (False, 0))
+        self.assertFalse(Like.objects.exists())
+        self.assertCountsConsistent()
+
+    def test_toggle_keeps_count_per_idea(self):
+        for user in self.users:
+            Like.objects.toggle(user, self.idea.pk)
+        Like.objects.toggle(self.users[0], self.idea.pk)
+        self.assertCountsConsistent()
+        self.assertEqual(self.idea.likes_count, 2)
+
+    def test_toggle_leaves_updated_at_alone(self):
+        updated_at = self.idea.updated_at
+        Like.objects.toggle(self.users[1], self.idea.pk)
+        self.idea.refresh_from_db()
+        self.assertEqual(self.idea.updated_at, updated_at)
+
+    def test_unlike_of_a_like_already_removed_changes_nothing(self):
+        Like.objects.toggle(self.users[1], self.idea.pk)
+        # Removed behind the counter's back, e.g. by a concurrent unlike
+        Like.objects.filter(user=self.users[1]).delete()
+        Idea.objects.filter(pk=self.idea.pk).update(likes_count=0)
+        self.assertEqual(Like.objects.toggle(self.users[1], self.idea.pk), (True, 1))
+        self.assertCountsConsistent()
+
+    def test_like_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        url = f'/api/ideas/{self.idea.pk}/like/'
+        self.assertEqual(client.post(url).status_code, 201)
+        self.assertEqual(client.post(url).status_code, 200)
+        self.assertEqual(client.post(url).status_code, 201)
+        self.assertCountsConsistent()
+        self.assertEqual(self.idea.likes_count, 1)
+
+    def test_apply_states_is_idempotent(self):
+        states = {(self.users[1].pk, self.idea.pk): True, (self.users[2].pk, self.idea.pk): False}
+        Like.objects.apply_states(states)
+        Like.objects.apply_states(states)
+        self.assertCountsConsistent()
+        self.assertEqual(self.idea.likes_count, 1)
+
+    def test_apply_states_skips_missing_users_and_ideas(self):
+        Like.objects.apply_states({(self.users[1].pk, self.idea.pk + 1): True, (10 ** 6, self.idea.pk): True})
+        self.assertFalse(Like.objects.exists())
+        self.assertCountsConsistent()
+
+
+@override_settings(**TEST_SETTINGS)
+class CursorTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('pitcher', password='pw')
+        self.ideas = [
+            Idea.objects.create(title=f'Idea {i}', description='An idea', pitcher=user) for i in range(5)
+        ]
+        for i in range(25):
+            Comment.objects.create(idea=self.ideas[0], commenter=user, content=f'Comment {i}')
+        self.client = APIClient()
+
+    def test_cursor_walks_every_comment_once(self):
+        seen = []
+        url = f'/api/ideas/{self.ideas[0].pk}/comments/'
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(comment['id'] for comment in data['results'])
+            url = data['next']
+        self.assertEqual(sorted(seen), sorted(Comment.objects.values_list('id', flat=True)))
+
+    def test_cursor_survives_deleting_its_row(self):
+        first = self.client.get(f'/api/ideas/{self.ideas[0].pk}/comments/').json()
+        Comment.objects.get(pk=first['results'][-1]['id']).delete()
+        response = self.client.get(first['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_tampered_cursors_are_not_found(self):
+        url = f'/api/ideas/{self.ideas[0].pk}/comments/?cursor='
+        for token in [
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            cursor_for({'created_at': 1}),
+            cursor_for(['2024-01-01T00:00:00Z']),
+            cursor_for([None, 1]),
+            cursor_for(['yesterday', 1]),
+            cursor_for(['2024-01-01T00:00:00Z', 'one']),
+            cursor_for(['2024-01-01T00:00:00Z', 2 ** 70]),
+        ]:
+            with self.subTest(token=token):
+                self.assertEqual(self.client.get(url + token).status_code, 404)
+        self.assertEqual(self.client.get('/api/ideas/?cursor=' + cursor_for(['Infinity', 1, 1])).status_code, 404)
+        self.assertEqual(self.client.get('/api/ideas/?cursor=' + cursor_for([1e400, 1, 1])).status_code, 404)
+
+    def test_cursor_from_another_ordering_is_not_found(self):
+        hot = KeysetPagination(ordering=IdeaPagination.orderings['hot']).encode_cursor(self.ideas[2])
+        self.assertEqual(self.client.get(f'/api/ideas/?cursor={hot}&ordering=hot').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/ideas/?cursor={hot}').status_code, 404)
+
+
+@override_settings(**TEST_SETTINGS)
+class LikeBufferRecoveryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log_path = os.path.join(self.directory, 'likes.log')
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(2)]
+        self.idea = Idea.objects.create(title='Idea', description='An idea', pitcher=self.users[0])
+
+    def open_buffer(self):
+        # Long enough that only the test flushes
+        like_buffer = LikeBuffer(self.log_path, flush_interval=3600)
+        self.addCleanup(like_buffer.close)
+        return like_buffer
+
+    def crash(self, like_buffer):
+        # Nothing is flushed; the log and its lock are simply let go
+        like_buffer.close()
+
+    def test_events_are_replayed_after_a_crash(self):
+        like_buffer = self.open_buffer()
+        like_buffer.record(self.users[0].pk, self.idea.pk, True)
+        like_buffer.record(self.users[1].pk, self.idea.pk, True)
+        like_buffer.record(self.users[1].pk, self.idea.pk, False)
+        self.crash(like_buffer)
+
+        recovered = self.open_buffer()
+        self.assertIs(recovered.pending_state(self.users[0].pk, self.idea.pk), True)
+        self.assertIs(recovered.pending_state(self.users[1].pk, self.idea.pk), False)
+        self.assertEqual(recovered.flush(), 2)
+        self.idea.refresh_from_db()
+        self.assertEqual(self.idea.likes_count, 1)
+        self.assertEqual(list(Like.objects.values_list('user_id', flat=True)), [self.users[0].pk])
+        self.assertFalse(os.path.exists(recovered.flushing_path))
+
+    def test_live_log_wins_over_a_half_flushed_segment(self):
+        with open(self.log_path + '.flushing', 'w') as segment:
+            segment.write(json.dumps({'u': self.users[0].pk, 'i': self.idea.pk, 'liked': True}) + '\n')
+            segment.write(json.dumps({'u': self.users[1].pk, 'i': self.idea.pk, 'liked': True}) + '\n')
+        with open(self.log_path, 'w') as log:
+            log.write(json.dumps({'u': self.users[1].pk, 'i': self.idea.pk, 'liked': False}) + '\n')
+            # Torn by the crash
+            log.write('{"u": 1, "i"')
+
+        recovered = self.open_buffer()
+        self.assertEqual(recovered.pending_for_user(self.users[1].pk), {self.idea.pk: False})
+        recovered.flush()
+        self.idea.refresh_from_db()
+        self.assertEqual(self.idea.likes_count, 1)
+
+    def test_replaying_a_flushed_batch_again_is_harmless(self):
+        like_buffer = self.open_buffer()
+        like_buffer.record(self.users[0].pk, self.idea.pk, True)
+        like_buffer.flush()
+        # As if the process died after committing but before removing the segment
+        with open(like_buffer.flushing_path, 'w') as segment:
+            segment.write(json.dumps({'u': self.users[0].pk, 'i': self.idea.pk, 'liked': True}) + '\n')
+        self.crash(like_buffer)
+
+        self.open_buffer().flush()
+        self.idea.refresh_from_db()
+        self.assertEqual(self.idea.likes_count, 1)
+
+    def test_second_buffer_on_the_same_log_is_refused(self):
+        self.open_buffer()
+        with self.assertRaises(ImproperlyConfigured):
+            LikeBuffer(self.log_path)
+
+
+@override_settings(**TEST_SETTINGS)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.register('test_ok', self.calls.append)
+
+    def register(self, kind, fn):
+        jobs.handler(kind)(fn)
+        self.addCleanup(jobs._handlers.pop, kind)
+
+    def test_pending_key_is_enqueued_once(self):
+        jobs.enqueue('test_ok', {'n': 1}, key='k')
+        jobs.enqueue('test_ok', {'n': 2}, key='k')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_running_key_does_not_block_new_work(self):
+        jobs.enqueue('test_ok', {'n': 1}, key='k')
+        claimed = jobs.claim()
+        jobs.enqueue('test_ok', {'n': 2}, key='k')
+        self.assertEqual([job.payload for job in claimed], [{'n': 1}])
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).get().payload, {'n': 2})
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        jobs.enqueue('test_ok')
+        self.assertEqual(len(jobs.claim()), 1)
+        self.assertEqual(jobs.claim(), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        jobs.enqueue('test_ok')
+        first, = jobs.claim()
+        Job.objects.filter(pk=first.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        second, = jobs.claim()
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.attempts, 2)
+        self.assertNotEqual(second.locked_by, first.locked_by)
+
+    def test_batch_runs_once_per_kind_and_is_removed(self):
+        for n in range(3):
+            jobs.enqueue('test_ok', {'n': n})
+        self.assertEqual(jobs.run_batch(), 3)
+        self.assertEqual(self.calls, [[{'n': 0}, {'n': 1}, {'n': 2}]])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failure_is_retried_with_backoff_then_given_up(self):
+        def fail(payloads):
+            raise RuntimeError('boom')
+
+        self.register('test_fail', fail)
+        jobs.enqueue('test_fail')
+        with self.assertLogs('api.jobs', 'ERROR'):
+            jobs.run_batch()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.PENDING, 1, ''))
+        self.assertEqual(job.last_error, 'RuntimeError: boom')
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(jobs.run_batch(), 0)
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('api.jobs', 'ERROR'):
+            jobs.run_batch()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(jobs.run_batch(), 0)
+
+    def test_failed_job_yields_to_a_pending_duplicate(self):
+        def fail(payloads):
+            raise RuntimeError('boom')
+
+        self.register('test_fail', fail)
+        jobs.enqueue('test_fail', key='k')
+        claimed, = jobs.claim()
+        jobs.enqueue('test_fail', key='k')
+        jobs._retry([claimed], 'RuntimeError: boom')
+        self.assertEqual(list(Job.objects.values_list('status', 'attempts')), [(Job.PENDING, 0)])
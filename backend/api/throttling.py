@@ -0,0 +1,162 @@
+"""
+Token-bucket throttling for likes and comments.
+
+Each client gets a bucket per scope (``like``, ``comment``) holding up to N
+tokens that refill continuously at N per period, for a rate of ``'N/period'``
+in ``THROTTLING['RATES']``. A write spends one token from the bucket of the
+authenticated user and one from the bucket of the client IP. When either is
+empty the request is refused with a 429 whose ``Retry-After`` says when the
+next token arrives. A client that stays under its rate is never refused, and
+an idle one can spend a full bucket in a burst. The client IP is DRF's
+``get_ident()``: ``REMOTE_ADDR``, or the address ``REST_FRAMEWORK['NUM_PROXIES']``
+hops back in ``X-Forwarded-For`` when the server sits behind proxies.
+
+A bucket is two numbers (tokens left, time of the last update), so a check is
+a couple of dictionary or cache operations and never touches the database.
+With ``THROTTLING['CACHE_ALIAS']`` set the buckets live in that Django cache
+and every server process shares them. Updates are then read-modify-write
+without a lock, so concurrent requests from one client in different
+processes can overspend by a token or two. Without a cache alias the buckets
+are process-local, exact, and capped at ``MAX_LOCAL_KEYS`` clients (least
+recently seen dropped first).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY = 'api:throttle:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_buckets = None
+_buckets_lock = threading.Lock()
+
+
+def _options():
+    return getattr(settings, 'THROTTLING', {})
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Turn ``'N/period'`` (period s, sec, m, min, h, hour, d, day) into (capacity, tokens per second)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip()[0]]
+
+
+def _refill(state, capacity, refill, now):
+    if state is None:
+        return float(capacity)
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * refill)
+
+
+def _spend(states, limits, now):
+    """
+    Take a token from every bucket in ``limits`` or from none of them.
+    Returns ``(wait, states)``: the seconds until every bucket has a token
+    and None, or 0 and the buckets' new states.
+    """
+    levels = [_refill(state, capacity, refill, now) for state, (_, capacity, refill) in zip(states, limits)]
+    wait = max(
+        ((1 - tokens) / refill for tokens, (_, _, refill) in zip(levels, limits) if tokens < 1),
+        default=0,
+    )
+    if wait:
+        return wait, None
+    return 0, [(tokens - 1, now) for tokens in levels]
+
+
+class LocalBuckets:
+    """Process-local buckets behind one lock."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, limits):
+        with self.lock:
+            now = time.time()
+            wait, states = _spend([self.entries.get(key) for key, _, _ in limits], limits, now)
+            if wait:
+                return wait
+            for (key, _, _), state in zip(limits, states):
+                self.entries[key] = state
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+            return 0
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CacheBuckets:
+    """Buckets kept in a Django cache shared by every server process."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, limits):
+        now = time.time()
+        found = self.cache.get_many([key for key, _, _ in limits])
+        wait, states = _spend([found.get(key) for key, _, _ in limits], limits, now)
+        if wait:
+            return wait
+        # A bucket left alone until it is full again is the same as no bucket
+        timeout = math.ceil(max(capacity / refill for _, capacity, refill in limits)) + 1
+        self.cache.set_many({key: state for (key, _, _), state in zip(limits, states)}, timeout)
+        return 0
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        with _buckets_lock:
+            if _buckets is None:
+                options = _options()
+                if options.get('CACHE_ALIAS'):
+                    _buckets = CacheBuckets(caches[options['CACHE_ALIAS']])
+                else:
+                    _buckets = LocalBuckets(max_keys=options.get('MAX_LOCAL_KEYS', 100000))
+    return _buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle a view's writes by the rates configured for its
+    ``throttle_scope``. Safe methods and scopes without rates pass freely.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        options = _options()
+        scope = getattr(view, 'throttle_scope', None)
+        rates = options.get('RATES', {}).get(scope)
+        if not options.get('ENABLED', True) or not rates or request.method in SAFE_METHODS:
+            return True
+
+        limits = []
+        if rates.get('user') and request.user.is_authenticated:
+            limits.append((KEY.format(scope, 'user', request.user.pk), *parse_rate(rates['user'])))
+        if rates.get('ip'):
+            limits.append((KEY.format(scope, 'ip', self.get_ident(request)), *parse_rate(rates['ip'])))
+        if not limits:
+            return True
+        wait = get_buckets().take(limits)
+        if wait:
+            self.retry_after = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework_nested import routers
+from . import async_views, metrics, streams
 from .views import (
-    IdeaViewSet, CommentViewSet, TopIdeasView,
+    IdeaViewSet, CommentViewSet, TopIdeasView, ExportView,
     UserRegistrationView, UserLoginView, UserLogoutView
 )
 
@@ -15,6 +16,16 @@ urlpatterns = [
     path('', include(router.urls)),
     path('', include(ideas_router.urls)),
     path('top-ideas/', TopIdeasView.as_view(), name='top-ideas'),
+    # Async read path for ASGI deployments (see api/async_views.py)
+    path('async/ideas/', async_views.idea_list, name='async-idea-list'),
+    path('async/ideas/<int:pk>/', async_views.idea_detail, name='async-idea-detail'),
+    path('async/ideas/<int:pk>/comments/', async_views.idea_comments, name='async-idea-comments'),
+    path('async/top-ideas/', async_views.top_ideas, name='async-top-ideas'),
+    # Server-Sent Event streams, answered before Django under ASGI (see api/streams.py)
+    path('stream/ideas/<int:pk>/', streams.unavailable, name='idea-stream'),
+    path('stream/leaderboard/', streams.unavailable, name='leaderboard-stream'),
+    path('metrics/', metrics.metrics_view, name='metrics'),
+    path('export/<slug:kind>/', ExportView.as_view(), name='export'),
     path('auth/register/', UserRegistrationView.as_view(), name='register'),
     path('auth/login/', UserLoginView.as_view(), name='login'),
     path('auth/logout/', UserLogoutView.as_view(), name='logout'),
@@ -1,16 +1,31 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth import authenticate, login, logout
+from rest_framework.utils.urls import replace_query_param
+from django.contrib.auth import login, logout
+from django.contrib.auth.signals import user_logged_in
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.cache import patch_vary_headers
+from django.middleware.gzip import re_accepts_gzip
+from . import conditional, db, detail_cache, export, hooks
+from .db import ReplicaReadMixin
+from .leaderboard import get_leaderboard
+from .like_buffer import get_like_buffer
 from .models import Idea, Comment, Like
+from .passwords import HashingBusy, authenticate_user
+from .pagination import CommentPagination, IdeaPagination
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer, dumps
+from .search import search_ideas
+from .throttling import TokenBucketThrottle
 from .serializers import (
-    IdeaSerializer, IdeaCreateSerializer, CommentSerializer, 
-    LikeSerializer, UserRegistrationSerializer, UserSerializer
+    IdeaSerializer, IdeaSummarySerializer, IdeaSearchResultSerializer, IdeaCreateSerializer, CommentSerializer, 
+    LikeSerializer, UserRegistrationSerializer, UserSerializer, get_liked_idea_ids
 )
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -19,69 +34,281 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         return obj.pitcher == request.user
 
-class IdeaViewSet(viewsets.ModelViewSet):
-    queryset = Idea.objects.all()
+class IdeaViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Idea.objects.with_related()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    pagination_class = IdeaPagination
+    # Writing actions pick their scope in THROTTLING['RATES']
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = None
+    search_page_size = 20
+    max_batch_ids = 300
+    
+    def get_queryset(self):
+        if self.action in ('like', 'comments', 'add_comment'):
+            # These actions only need to know the idea exists
+            return Idea.objects.only('id')
+        if self.action == 'list':
+            return Idea.objects.with_summary().order_by(*IdeaPagination.get_ordering(self.request.query_params))
+        return super().get_queryset()
     
     def get_serializer_class(self):
         if self.action == 'create':
             return IdeaCreateSerializer
+        if self.action == 'list':
+            return IdeaSummarySerializer
         return IdeaSerializer
     
     def perform_create(self, serializer):
-        serializer.save(pitcher=self.request.user)
+        idea = serializer.save(pitcher=self.request.user)
+        hooks.idea_created(idea)
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        hooks.idea_changed(serializer.instance.pk)
+    
+    def perform_destroy(self, instance):
+        idea_id = instance.pk
+        super().perform_destroy(instance)
+        hooks.idea_changed(idea_id)
     
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def list(self, request, *args, **kwargs):
+        validators = conditional.collection_validators(request)
+        response = conditional.not_modified(request, *validators)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return conditional.set_validators(response, *validators)
+    
+    def retrieve(self, request, *args, **kwargs):
+        # One indexed lookup decides whether the client's copy is current
+        try:
+            updated_at = Idea.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        version = conditional.idea_version(kwargs['pk'])
+        validators = conditional.idea_validators(request, kwargs['pk'], updated_at, version)
+        response = conditional.not_modified(request, *validators)
+        if response is None and self._detail_cacheable(request):
+            response = self._cached_retrieve(request, kwargs['pk'], updated_at, version, validators[1])
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return conditional.set_validators(response, *validators)
+    
+    def _detail_cacheable(self, request):
+        # Cached bodies are compact JSON; the browsable API and ?indent= render as usual
+        renderer = request.accepted_renderer
+        return (
+            detail_cache.enabled() and isinstance(renderer, FastJSONRenderer)
+            and renderer.get_indent(request.accepted_media_type, {}) is None
+        )
+    
+    def _cached_retrieve(self, request, pk, updated_at, version, last_modified):
+        def build():
+            # Reading is always allowed, so skipping get_object() on a hit skips no check
+            idea = self.get_object()
+            context = dict(self.get_serializer_context(), liked_idea_ids=set())
+            return dumps(IdeaSerializer(idea, context=context).data)
+        
+        key = detail_cache.detail_key(request, pk, updated_at, version)
+        body = detail_cache.get_detail_cache().get(key, build, last_modified)
+        liked = request.user.is_authenticated and int(pk) in get_liked_idea_ids(request.user, [pk])
+        return HttpResponse(detail_cache.with_liked(body, liked), content_type='application/json')
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated], throttle_scope='like')
     def like(self, request, pk=None):
         idea = self.get_object()
-        user = request.user
+        like_buffer = get_like_buffer()
         
-        like, created = Like.objects.get_or_create(user=user, idea=idea)
+        if like_buffer is not None:
+            liked = like_buffer.toggle(request.user.pk, idea.pk)
+            hooks.likes_changed(idea.pk, counted=False)
+        else:
+            liked, likes_count = Like.objects.toggle(request.user, idea.pk)
+            hooks.likes_changed(idea.pk, likes_count)
         
-        if not created:
-            # Unlike if already liked
-            like.delete()
+        if not liked:
             return Response({'status': 'unliked'}, status=status.HTTP_200_OK)
         
         return Response({'status': 'liked'}, status=status.HTTP_201_CREATED)
     
+    def _batch_ids(self, request):
+        """Parse ``?ids=1,2,3`` into a de-duplicated list, keeping request order."""
+        raw = request.query_params.get('ids', '')
+        try:
+            ids = [int(value) for value in raw.split(',') if value.strip()]
+        except ValueError:
+            raise ValidationError({'ids': 'Expected a comma-separated list of idea ids'})
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError({'ids': 'Please provide at least one idea id'})
+        if len(ids) > self.max_batch_ids:
+            raise ValidationError({'ids': f'At most {self.max_batch_ids} ids per request'})
+        return ids
+    
+    @action(detail=False, methods=['get'], url_path='like-status')
+    def like_status(self, request):
+        ids = self._batch_ids(request)
+        counts = dict(Idea.objects.filter(pk__in=ids).values_list('id', 'likes_count'))
+        if request.user.is_authenticated:
+            liked_idea_ids = get_liked_idea_ids(request.user, list(counts))
+        else:
+            liked_idea_ids = set()
+        return Response([
+            {'id': idea_id, 'likes_count': counts[idea_id], 'is_liked': idea_id in liked_idea_ids}
+            for idea_id in ids if idea_id in counts
+        ])
+    
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        ids = self._batch_ids(request)
+        ideas = Idea.objects.with_summary().in_bulk(ids)
+        serializer = IdeaSummarySerializer(
+            [ideas[idea_id] for idea_id in ids if idea_id in ideas],
+            many=True, context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Please provide a search query'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        page_size = self.search_page_size
+        
+        ideas, has_more = search_ideas(query, page_size, (page - 1) * page_size)
+        serializer = IdeaSearchResultSerializer(ideas, many=True, context=self.get_serializer_context())
+        next_url = None
+        if has_more:
+            next_url = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+        return Response({'next': next_url, 'results': serializer.data})
+    
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         idea = self.get_object()
-        comments = idea.comments.all()
+        paginator = CommentPagination()
+        comments = paginator.paginate_queryset(idea.comments.select_related('commenter'), request, view=self)
         serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='comment')
     def add_comment(self, request, pk=None):
         idea = self.get_object()
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(commenter=request.user, idea=idea)
+            comment = serializer.save(commenter=request.user, idea=idea)
+            hooks.comment_added(comment)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CommentPagination
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'comment'
     
     def perform_create(self, serializer):
         idea_id = self.kwargs.get('idea_pk')
         idea = Idea.objects.get(pk=idea_id)
-        serializer.save(commenter=self.request.user, idea=idea)
+        comment = serializer.save(commenter=self.request.user, idea=idea)
+        hooks.comment_added(comment)
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        hooks.comment_changed(serializer.instance)
+    
+    def perform_destroy(self, instance):
+        idea_id, comment_id = instance.idea_id, instance.pk
+        super().perform_destroy(instance)
+        hooks.comment_removed(idea_id, comment_id)
     
     def get_queryset(self):
         idea_id = self.kwargs.get('idea_pk')
-        return Comment.objects.filter(idea_id=idea_id)
+        return Comment.objects.filter(idea_id=idea_id).select_related('commenter')
 
-class TopIdeasView(APIView):
+class TopIdeasView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
-        top_ideas = Idea.objects.all()[:5]
-        serializer = IdeaSerializer(top_ideas, many=True, context={'request': request})
-        return Response(serializer.data)
+        version = conditional.collection_version()
+        validators = conditional.collection_validators(request, version)
+        response = conditional.not_modified(request, *validators)
+        if response is None:
+            response = self.get_top_ideas(request, version)
+        return conditional.set_validators(response, *validators)
+    
+    def get_top_ideas(self, request, version):
+        if request.query_params.get(IdeaPagination.ordering_query_param) == 'hot':
+            return self.get_hot_ideas(request)
+        board = get_leaderboard()
+        # A board stamped with another version would not match the ETag
+        state = board.get(version)
+        fields = request.query_params.get('fields')
+        if not request.user.is_authenticated and not fields:
+            # Anonymous visitors all see the same pre-rendered body
+            return HttpResponse(state['body'], content_type='application/json')
+        
+        top_ideas = [dict(entry) for entry in state['entries'][:board.size]]
+        if request.user.is_authenticated:
+            liked_idea_ids = get_liked_idea_ids(request.user, [entry['id'] for entry in top_ideas])
+        else:
+            liked_idea_ids = set()
+        for entry in top_ideas:
+            entry['is_liked'] = entry['id'] in liked_idea_ids
+        if fields:
+            keep = {name.strip() for name in fields.split(',')}
+            top_ideas = [{k: v for k, v in entry.items() if k in keep} for entry in top_ideas]
+        return Response(top_ideas)
+    
+    def get_hot_ideas(self, request):
+        # A plain walk down idea_hot_idx; the scores are kept current by writes
+        # and the refresh_hot_scores command
+        ordering = IdeaPagination.orderings['hot']
+        ideas = Idea.objects.with_summary().order_by(*ordering)[:get_leaderboard().size]
+        return Response(IdeaSummarySerializer(ideas, many=True, context={'request': request}).data)
+
+class ExportView(APIView):
+    """Stream a whole table as NDJSON (default) or CSV; see api/export.py."""
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    def get(self, request, kind):
+        if kind not in export.EXPORTS:
+            return Response({'error': f'Unknown export, expected one of: {", ".join(export.EXPORTS)}'},
+                          status=status.HTTP_404_NOT_FOUND)
+        updated_since = None
+        if request.query_params.get('updated_since'):
+            try:
+                updated_since = export.parse_since(request.query_params['updated_since'])
+            except ValueError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        fmt = request.accepted_renderer.format
+        gzip = bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        # Rows are read after this method returns, so pick the database now
+        using = db.choose_read_alias(request) or db.PRIMARY
+        response = StreamingHttpResponse(
+            export.stream_export(kind, fmt, updated_since, using=using, gzip=gzip),
+            content_type=export.FORMATS[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+def hashing_busy_response():
+    return Response({'error': 'Too many sign-ins in progress, please retry shortly'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
 
 @method_decorator(csrf_exempt, name='dispatch')
 class UserRegistrationView(APIView):
@@ -90,7 +317,10 @@ class UserRegistrationView(APIView):
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except HashingBusy:
+                return hashing_busy_response()
             refresh = RefreshToken.for_user(user)
             return Response({
                 'user': UserSerializer(user).data,
@@ -111,10 +341,18 @@ class UserLoginView(APIView):
             return Response({'error': 'Please provide both username and password'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        user = authenticate(username=username, password=password)
+        try:
+            user = authenticate_user(request, username, password)
+        except HashingBusy:
+            return hashing_busy_response()
         
         if user:
-            login(request, user)
+            # Clients using the returned JWT pair don't need a session row,
+            # but last_login and user_logged_in receivers still should run
+            if request.data.get('session'):
+                login(request, user)
+            else:
+                user_logged_in.send(sender=user.__class__, request=request, user=user)
             refresh = RefreshToken.for_user(user)
             return Response({
                 'user': UserSerializer(user).data,
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Compare the WSGI deployment with the async ASGI read path.
+
+Both applications are driven in-process, with no network in between, against
+a scratch SQLite database seeded at ``--scale`` (see common.SCALES):
+
+* WSGI: ``startup_platform.wsgi.application`` called from a pool of
+  ``--concurrency`` worker threads, one request per thread at a time, the
+  way a threaded WSGI server runs it.
+* ASGI: ``startup_platform.asgi.application`` with ``--concurrency``
+  in-flight requests on one event loop, hitting the ``/api/async/`` views.
+
+Both sides get the same number of requests in flight. Latency includes the
+time a request waits behind the others in flight (roughly concurrency /
+throughput), so comparing a wide ASGI fan-out with a few WSGI threads would
+measure queueing rather than the handlers. Each side is warmed up before it
+is timed, so imports, URL resolution and the first queries don't land on
+the first requests.
+
+Each run also reports the database connections it opened. Django runs an
+ASGI request's synchronous code (the ORM included) in a thread of its own,
+and connections are per thread, so the async views open a connection per
+request where WSGI threads reuse theirs; that is part of the ASGI numbers.
+
+Usage (from backend/):
+
+    python benchmarks/asgi_vs_wsgi.py --scale small --requests 2000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from common import percentiles, seed, setup_django
+
+ENDPOINTS = ['ideas/', 'ideas/?cursor=', 'top-ideas/', 'ideas/{id}/', 'ideas/{id}/comments/']
+
+
+def request_paths(prefix, ids, total):
+    return [prefix + ENDPOINTS[i % len(ENDPOINTS)].format(id=ids[i % len(ids)]) for i in range(total)]
+
+
+def summarize(name, latencies, elapsed, connections):
+    p50, p95, p99 = percentiles(latencies)
+    print(f'{name:<6} {len(latencies) / elapsed:9.1f} req/s   '
+          f'p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   p99 {p99:7.2f} ms   '
+          f'{connections} db connections opened')
+
+
+class ConnectionCounter:
+    """Count database connections opened while the block runs."""
+
+    def __enter__(self):
+        from django.db.backends.signals import connection_created
+
+        self.count = 0
+        connection_created.connect(self.opened)
+        return self
+
+    def __exit__(self, *exc_info):
+        from django.db.backends.signals import connection_created
+
+        connection_created.disconnect(self.opened)
+
+    def opened(self, **kwargs):
+        self.count += 1
+
+
+def run_wsgi(paths, threads):
+    from startup_platform.wsgi import application
+
+    def call(path):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        started = time.perf_counter()
+        body = b''.join(application(environ, lambda status, headers: None))
+        assert body
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = list(pool.map(call, paths))
+    return latencies, time.perf_counter() - started
+
+
+async def run_asgi(paths, concurrency):
+    from startup_platform.asgi import application
+
+    async def call(path):
+        url = urlsplit(path)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+            'query_string': url.query.encode(), 'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+        }
+        chunks = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        assert chunks
+        return time.perf_counter() - started
+
+    queue = list(reversed(paths))
+    latencies = []
+
+    async def worker():
+        while queue:
+            latencies.append(await call(queue.pop()))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=['small', '10k', '1m'], default='small')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='requests in flight: WSGI worker threads and concurrent ASGI requests')
+    parser.add_argument('--warmup', type=int, default=50, help='untimed requests sent to each side first')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary one)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    setup_django(db_path)
+    _, ids = seed(args.scale)
+    ids = ids[:100]
+    concurrency = min(args.concurrency, args.requests)
+    print(f'{args.requests} requests over {", ".join(ENDPOINTS)}, {concurrency} in flight')
+
+    run_wsgi(request_paths('/api/', ids, args.warmup), concurrency)
+    with ConnectionCounter() as counter:
+        result = run_wsgi(request_paths('/api/', ids, args.requests), concurrency)
+    summarize('wsgi', *result, counter.count)
+
+    asyncio.run(run_asgi(request_paths('/api/async/', ids, args.warmup), concurrency))
+    with ConnectionCounter() as counter:
+        result = asyncio.run(run_asgi(request_paths('/api/async/', ids, args.requests), concurrency))
+    summarize('asgi', *result, counter.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Shared setup for the benchmark scripts in this directory."""
+
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'startup_platform.settings')
+
+SCALES = {
+    'small': {'users': 200, 'ideas': 1_000, 'likes_per_idea': 5, 'comments_per_idea': 3},
+    '10k': {'users': 2_000, 'ideas': 10_000, 'likes_per_idea': 10, 'comments_per_idea': 5},
+    '1m': {'users': 50_000, 'ideas': 1_000_000, 'likes_per_idea': 5, 'comments_per_idea': 2},
+}
+
+
+def setup_django(db_path):
+    """Point Django at ``db_path``, set it up and bring the schema up to date."""
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    # Every simulated user shares one client address; keep per-user limits only
+    settings.THROTTLING['RATES'] = {
+        scope: {kind: rate for kind, rate in rates.items() if kind != 'ip'}
+        for scope, rates in settings.THROTTLING['RATES'].items()
+    }
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(scale, batch_size=5000):
+    """
+    Fill an empty database with a data set of the given scale using the
+    ``generate_data`` command and return ``(user_ids, idea_ids)``. An already
+    seeded database is reused as is.
+    """
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from api.models import Idea
+
+    if not Idea.objects.exists():
+        config = SCALES[scale]
+        call_command(
+            'generate_data',
+            users=config['users'],
+            ideas=config['ideas'],
+            likes_per_idea=config['likes_per_idea'],
+            comments_per_idea=config['comments_per_idea'],
+            chunk_size=batch_size,
+            verbosity=0,
+        )
+    user_ids = list(User.objects.values_list('id', flat=True)[:1000])
+    idea_ids = list(Idea.objects.values_list('id', flat=True)[:1000])
+    return user_ids, idea_ids
+
+
+def percentiles(latencies):
+    """Return p50, p95 and p99 of a list of latencies, in milliseconds."""
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return value, value, value
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49] * 1000, quantiles[94] * 1000, quantiles[98] * 1000
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare JSON encode and decode times of DRF's stock classes with api/renderers.py.
+
+Response payloads are captured from the real views against a scratch SQLite
+database seeded at ``--scale`` (see common.SCALES), then each one is rendered
+``--repeat`` times by ``JSONRenderer`` and ``FastJSONRenderer`` and parsed
+back by ``JSONParser`` and ``FastJSONParser``. Every payload is also checked
+to encode to the same bytes both ways, so the numbers compare like with like:
+
+* ``ideas/``: a 100-item summary page
+* ``top-ideas/``: the 100-item top ideas page
+* ``ideas/{id}/``: idea details with their first page of nested comments
+* ``values()``: 100 raw idea rows with native datetimes, which DRF's
+  encoder has to convert one by one
+
+Usage (from backend/):
+
+    python benchmarks/json_encoding.py --scale small --repeat 200
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from io import BytesIO
+
+from common import seed, setup_django
+
+
+def capture(paths):
+    from django.test import Client
+
+    client = Client()
+    payloads = []
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        # The top ideas page is served pre-rendered by the leaderboard
+        payloads.append(response.data if hasattr(response, 'data') else json.loads(response.content))
+    return payloads
+
+
+def timed(fn, payloads, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            fn(payload)
+    return (time.perf_counter() - started) / (repeat * len(payloads)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=['small', '10k', '1m'], default='small')
+    parser.add_argument('--repeat', type=int, default=200, help='encodes of each payload')
+    parser.add_argument('--details', type=int, default=20, help='idea detail pages to capture')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary one)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    setup_django(db_path)
+    seed(args.scale)
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api import renderers
+    from api.models import Idea
+
+    if renderers.orjson is None:
+        print('orjson is not installed; FastJSONRenderer falls back to JSONRenderer')
+
+    # Most commented ideas first, so detail pages carry full comment pages
+    detail_ids = list(Idea.objects.order_by('-comments_count').values_list('id', flat=True)[:args.details])
+    pages = {
+        'ideas/': capture(['/api/ideas/']),
+        'top-ideas/': capture(['/api/top-ideas/']),
+        'ideas/{id}/': capture([f'/api/ideas/{pk}/' for pk in detail_ids]),
+        'values()': [list(Idea.objects.order_by('-id').values()[:100])],
+    }
+
+    stock, fast = JSONRenderer(), renderers.FastJSONRenderer()
+    stock_parser, fast_parser = JSONParser(), renderers.FastJSONParser()
+    print(f'{"payload":<14}{"bytes":>9}{"encode ms":>20}{"decode ms":>20}')
+    print(f'{"":<14}{"":>9}{"drf":>10}{"fast":>10}{"drf":>10}{"fast":>10}')
+    for name, payloads in pages.items():
+        for payload in payloads:
+            expected = stock.render(payload)
+            assert fast.render(payload) == expected, f'{name}: output differs from JSONRenderer'
+        bodies = [stock.render(payload) for payload in payloads]
+        size = sum(map(len, bodies)) // len(bodies)
+        print(
+            f'{name:<14}{size:>9}'
+            f'{timed(stock.render, payloads, args.repeat):>10.3f}'
+            f'{timed(fast.render, payloads, args.repeat):>10.3f}'
+            f'{timed(lambda body: stock_parser.parse(BytesIO(body)), bodies, args.repeat):>10.3f}'
+            f'{timed(lambda body: fast_parser.parse(BytesIO(body)), bodies, args.repeat):>10.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
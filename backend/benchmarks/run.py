@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmarks for the REST API.
+
+Drives realistic traffic mixes against the API and reports, per endpoint,
+requests per second, p50/p95/p99 latency and (in-process only) database
+queries per request. Runs either in-process through the WSGI application on
+a scratch database seeded at ``--scale``, or against a running server with
+``--url`` (use ``--db`` to point at that server's database so test users and
+tokens can be minted).
+
+Scenarios:
+
+* ``browse``: home page traffic (idea list, top ideas, cursor pages)
+* ``detail``: idea detail pages and their comment pages
+* ``like_storm``: many users toggling likes on a handful of hot ideas
+* ``comment_burst``: many users commenting on a handful of ideas
+
+Results can be stored as a baseline and later runs compared against it:
+
+    python benchmarks/run.py --scale 10k --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --scale 10k --compare benchmarks/baseline.json
+
+A comparison exits with status 1 if any endpoint got slower (p95) or lost
+throughput by more than ``--tolerance``, or runs more queries per request.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SCALES, percentiles, seed, setup_django
+
+SCENARIOS = {
+    'browse': [
+        (6, 'GET', 'ideas/'),
+        (3, 'GET', 'top-ideas/'),
+        (2, 'GET', 'ideas/?cursor='),
+    ],
+    'detail': [
+        (7, 'GET', 'ideas/{idea}/'),
+        (3, 'GET', 'ideas/{idea}/comments/'),
+    ],
+    'like_storm': [
+        (1, 'POST', 'ideas/{hot_idea}/like/'),
+    ],
+    'comment_burst': [
+        (1, 'POST', 'ideas/{hot_idea}/add_comment/'),
+    ],
+}
+
+
+class InProcessClient:
+    """Calls the WSGI application directly and counts queries per request."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.local = threading.local()
+        self.client_class = Client
+
+    def request(self, method, path, token, data=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.client_class()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'GET':
+                response = self.local.client.get(path, **headers)
+            else:
+                response = self.local.client.post(path, data or {}, content_type='application/json', **headers)
+        return response.status_code, len(queries.captured_queries)
+
+
+class HttpClient:
+    """Sends real HTTP requests to a running server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token, data=None):
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, None
+
+
+def mint_tokens(user_ids, count):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    users = User.objects.filter(pk__in=user_ids[:count])
+    return [str(RefreshToken.for_user(user).access_token) for user in users]
+
+
+def run_scenario(client, name, idea_ids, tokens, total, concurrency, rng):
+    mix = SCENARIOS[name]
+    hot_ideas = idea_ids[:10]
+    plan = []
+    for _ in range(total):
+        _, method, template = rng.choices(mix, weights=[weight for weight, _, _ in mix])[0]
+        path = '/api/' + template.format(idea=rng.choice(idea_ids), hot_idea=rng.choice(hot_ideas))
+        data = {'content': 'A benchmark comment under load.'} if 'add_comment' in template else None
+        # Reads are a mix of anonymous and signed-in visitors; writes need a user
+        token = rng.choice(tokens) if method == 'POST' or rng.random() < 0.5 else None
+        plan.append((f'{method} {template}', method, path, token, data))
+
+    samples = {}
+    lock = threading.Lock()
+
+    def call(item):
+        label, method, path, token, data = item
+        started = time.perf_counter()
+        status, queries = client.request(method, path, token, data)
+        elapsed = time.perf_counter() - started
+        with lock:
+            sample = samples.setdefault(label, {'latencies': [], 'errors': 0, 'queries': []})
+            sample['latencies'].append(elapsed)
+            if status >= 400:
+                sample['errors'] += 1
+            if queries is not None:
+                sample['queries'].append(queries)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, plan))
+    wall = time.perf_counter() - started
+
+    results = {}
+    for label, sample in samples.items():
+        p50, p95, p99 = percentiles(sample['latencies'])
+        results[label] = {
+            'requests': len(sample['latencies']),
+            'errors': sample['errors'],
+            'rps': round(len(sample['latencies']) / wall, 2),
+            'p50_ms': round(p50, 3),
+            'p95_ms': round(p95, 3),
+            'p99_ms': round(p99, 3),
+            'queries_per_request': (
+                round(sum(sample['queries']) / len(sample['queries']), 2) if sample['queries'] else None
+            ),
+        }
+    return results
+
+
+def print_results(results):
+    print(f'{"endpoint":<42} {"reqs":>6} {"err":>5} {"rps":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"q/req":>6}')
+    for scenario, endpoints in results.items():
+        print(f'[{scenario}]')
+        for label, r in sorted(endpoints.items()):
+            queries = '-' if r['queries_per_request'] is None else f'{r["queries_per_request"]:.1f}'
+            print(f'  {label:<40} {r["requests"]:>6} {r["errors"]:>5} {r["rps"]:>9.1f} '
+                  f'{r["p50_ms"]:>9.2f} {r["p95_ms"]:>9.2f} {r["p99_ms"]:>9.2f} {queries:>6}')
+
+
+def compare(baseline, results, tolerance):
+    """Return a list of human-readable regressions against a baseline run."""
+    regressions = []
+    for scenario, endpoints in baseline['results'].items():
+        for label, before in endpoints.items():
+            after = results.get(scenario, {}).get(label)
+            if after is None:
+                continue
+            name = f'{scenario} {label}'
+            if after['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f'{name}: p95 {before["p95_ms"]:.2f} -> {after["p95_ms"]:.2f} ms')
+            if after['rps'] < before['rps'] * (1 - tolerance):
+                regressions.append(f'{name}: throughput {before["rps"]:.1f} -> {after["rps"]:.1f} req/s')
+            if (before['queries_per_request'] is not None and after['queries_per_request'] is not None
+                    and after['queries_per_request'] > before['queries_per_request']):
+                regressions.append(
+                    f'{name}: queries/request {before["queries_per_request"]} -> {after["queries_per_request"]}'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1234, help='random seed for the traffic mix')
+    parser.add_argument('--db', help='SQLite database (default: a temporary one seeded at --scale)')
+    parser.add_argument('--url', help='benchmark a running server, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write the results to PATH as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a baseline written earlier')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative slowdown before a comparison fails (default 0.2)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    setup_django(db_path)
+    user_ids, idea_ids = seed(args.scale)
+    tokens = mint_tokens(user_ids, 200)
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    rng = random.Random(args.seed)
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = run_scenario(client, name, idea_ids, tokens, args.requests, args.concurrency, rng)
+    print_results(results)
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'target': args.url or 'in-process',
+        },
+        'results': results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f'Baseline written to {args.save_baseline}')
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.tolerance)
+        if regressions:
+            print('Regressions against baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            raise SystemExit(1)
+        print('No regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'startup_platform.settings')
+# Every request runs in a fresh thread, so a persistent connection would only
+# sit idle until it aged out (see DATABASES in settings.py)
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
-application = get_asgi_application() 
\ No newline at end of file
+django_application = get_asgi_application()
+
+# Imported once Django is set up; serves /api/stream/ without a thread per stream
+from api.streams import StreamRouter  # noqa: E402
+
+application = StreamRouter(django_application)
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,11 +63,72 @@ TEMPLATES = [
 WSGI_APPLICATION = 'startup_platform.wsgi.application'
 
 # Database
+# Connections are kept open between requests for CONN_MAX_AGE seconds, and
+# SQLite runs in WAL mode (see api/db.py) so readers don't block behind a
+# writer. Under ASGI each request runs in a new thread and can't reuse a
+# connection, so asgi.py sets CONN_MAX_AGE=0 to close them per request.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+    }
+}
+
+# A local read replica for development: a second SQLite file refreshed from
+# the primary with `manage.py sync_replicas --interval 1`.
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = ['api.db.PrimaryReplicaRouter']
+
+# 'default' is private to each server process. 'shared' holds state every
+# process must agree on (conditional-GET versions, recent writers); the file
+# cache covers processes on one host. Set SHARED_CACHE_URL=redis://... when
+# the servers span several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'api.cache.FileCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+if os.environ.get('SHARED_CACHE_URL'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['SHARED_CACHE_URL'],
     }
+
+# Read routing (see api/db.py). MAX_LAG must bound replication lag; writers
+# read from the primary for that long. CACHE_ALIAS must be shared by every
+# server process.
+DATABASE_REPLICATION = {
+    'REPLICAS': ['replica'],
+    'MAX_LAG': 5,
+    'CACHE_ALIAS': 'shared',
 }
 
 # Password validation
@@ -103,14 +165,139 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # orjson-backed drop-ins for DRF's JSON renderer and parser
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 100
+    'PAGE_SIZE': 100,
+    # Client IPs for throttling come from REMOTE_ADDR. Behind N reverse proxies
+    # that append to X-Forwarded-For, set NUM_PROXIES=N to read the client's
+    # address from that header instead; otherwise clients could spoof it.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Write-behind buffering of like events (see api/like_buffer.py).
+# The log is owned by a single server process, and a second one using the same
+# LOG_PATH fails to start; stop the server before `manage.py flush_likes`.
+LIKE_BUFFER = {
+    'ENABLED': False,
+    'LOG_PATH': BASE_DIR / 'like_events.log',
+    'BATCH_SIZE': 5000,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Top-ideas leaderboard (see api/leaderboard.py). A board is rebuilt when it
+# missed a write to the idea collection, so a process-local one (CACHE_ALIAS
+# None) is rebuilt after writes handled by other processes. Set CACHE_ALIAS to
+# one of CACHES to share it instead. Boards are dropped after TIMEOUT seconds.
+LEADERBOARD = {
+    'SIZE': 5,
+    'DEPTH': 20,
+    'CACHE_ALIAS': None,
+    'TIMEOUT': 300,
+}
+
+# Trending ("hot") ranking (see hot_decay() in api/models.py). Scores decay
+# with age, so run `manage.py refresh_hot_scores` every few minutes.
+HOT_RANKING = {
+    'GRAVITY': 1.8,
+    'COMMENT_WEIGHT': 2.0,
+    'BATCH_SIZE': 1000,
+}
+
+# Version counters behind ETag/Last-Modified on idea endpoints (see
+# api/conditional.py). Must be a cache shared by every server process.
+CONDITIONAL_GET = {
+    'CACHE_ALIAS': 'shared',
+}
+
+# Server-Sent Event push (see api/realtime.py and api/streams.py). With several
+# ASGI processes on one machine, use 'api.realtime.UnixSocketBackend' with
+# 'OPTIONS': {'PATH': BASE_DIR / 'realtime'} so events reach all of them.
+# Streams close after MAX_STREAM_SECONDS and the client reconnects.
+REALTIME = {
+    'BACKEND': 'api.realtime.LocalBackend',
+    'OPTIONS': {},
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT': 15,
+    'MAX_STREAM_SECONDS': 300,
+}
+
+# Per-request instrumentation (see api/metrics.py). Histograms are kept per
+# process and served at /api/metrics/ to ALLOWED_IPS and staff users.
+METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# In-process cache of users resolved from JWTs (see api/authentication.py).
+# TIMEOUT bounds how long another process may serve a changed user.
+AUTH_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TIMEOUT': 60,
+}
+
+# Password hashing for login and registration runs on a pool of worker
+# processes (see api/passwords.py). Requests beyond MAX_PENDING queued hashes
+# get a 503 with Retry-After. WORKERS = 0 hashes on the request thread.
+PASSWORD_HASHING = {
+    'WORKERS': 2,
+    'MAX_PENDING': 16,
+    'TIMEOUT': 10,
+}
+
+# Streaming exports at /api/export/<kind>/ and `manage.py export_data` (see
+# api/export.py) read CHUNK_SIZE rows per query.
+EXPORT = {
+    'CHUNK_SIZE': 2000,
+}
+
+# Token-bucket limits on likes and comments (see api/throttling.py), per
+# authenticated user and per client IP, as 'N/period'. Buckets are
+# process-local unless CACHE_ALIAS names a cache shared by every process.
+THROTTLING = {
+    'ENABLED': True,
+    'CACHE_ALIAS': None,
+    'MAX_LOCAL_KEYS': 100000,
+    'RATES': {
+        'like': {'user': '120/min', 'ip': '1200/min'},
+        'comment': {'user': '20/min', 'ip': '200/min'},
+    },
+}
+
+# Deferred follow-up work (see api/jobs.py), run by `manage.py run_jobs`.
+# With ASYNC = False jobs run inline, for development without a worker.
+JOBS = {
+    'ASYNC': True,
+    'BATCH_SIZE': 500,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 5,
+    'LEASE': 60,
+}
+
+# Read-through cache of rendered idea detail bodies (see api/detail_cache.py).
+# MAX_SIZE bodies are kept per process in front of the CACHE_ALIAS cache, which
+# should be shared by every process (None for the process-local tier only);
+# TIMEOUT is in seconds.
+DETAIL_CACHE = {
+    'ENABLED': True,
+    'MAX_SIZE': 1000,
+    'CACHE_ALIAS': 'shared',
+    'TIMEOUT': 3600,
 }
 
 # JWT Settings
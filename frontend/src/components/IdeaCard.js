@@ -59,7 +59,7 @@ const IdeaCard = ({ idea }) => {
       <div className="idea-footer">
         <div className="idea-stats">
           <span className="comments-count">
-            💬 {idea.comments?.length || 0} comments
+            💬 {idea.comments_count ?? idea.comments?.length ?? 0} comments
           </span>
           <span className="likes-count">
             ❤️ {likes} likes
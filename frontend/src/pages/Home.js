@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 import IdeaCard from '../components/IdeaCard';
@@ -7,6 +7,8 @@ import './Home.css';
 const Home = () => {
   const [topIdeas, setTopIdeas] = useState([]);
   const [allIdeas, setAllIdeas] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [currentQuoteIndex, setCurrentQuoteIndex] = useState(0);
 
@@ -35,11 +37,12 @@ const Home = () => {
     try {
       const [topResponse, allResponse] = await Promise.all([
         axios.get('/api/top-ideas/'),
-        axios.get('/api/ideas/')
+        axios.get('/api/ideas/', { params: { cursor: '' } })
       ]);
       
       setTopIdeas(topResponse.data);
-      setAllIdeas(allResponse.data.results || allResponse.data);
+      setAllIdeas(allResponse.data.results);
+      setNextCursor(cursorFrom(allResponse.data.next));
     } catch (error) {
       console.error('Error fetching ideas:', error);
     } finally {
@@ -47,6 +50,30 @@ const Home = () => {
     }
   };
 
+  const cursorFrom = (nextUrl) => (nextUrl ? new URL(nextUrl).searchParams.get('cursor') : null);
+
+  const fetchMoreIdeas = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get('/api/ideas/', { params: { cursor: nextCursor } });
+      setAllIdeas((prev) => [...prev, ...response.data.results]);
+      setNextCursor(cursorFrom(response.data.next));
+    } catch (error) {
+      console.error('Error fetching more ideas:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
+  const handleSliderScroll = (e) => {
+    const { scrollLeft, scrollWidth, clientWidth } = e.currentTarget;
+    // Load the next page before the user reaches the end of the slider
+    if (scrollWidth - scrollLeft - clientWidth < clientWidth) {
+      fetchMoreIdeas();
+    }
+  };
+
   if (loading) {
     return (
       <div className="loading">
@@ -91,7 +118,7 @@ const Home = () => {
       <section className="other-ideas-section">
         <div className="container">
           <h2 className="section-title">💡 More Ideas</h2>
-          <div className="ideas-slider">
+          <div className="ideas-slider" onScroll={handleSliderScroll}>
             {allIdeas.slice(5).map((idea) => (
               <div key={idea.id} className="slider-item">
                 <IdeaCard idea={idea} />
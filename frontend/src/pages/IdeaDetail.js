@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import axios from 'axios';
@@ -11,6 +11,10 @@ const IdeaDetail = () => {
   
   const [idea, setIdea] = useState(null);
   const [comments, setComments] = useState([]);
+  const [commentsCount, setCommentsCount] = useState(0);
+  const [commentsNext, setCommentsNext] = useState(null);
+  const [moreCommentsLoading, setMoreCommentsLoading] = useState(false);
+  const seenCommentIds = useRef(new Set());
   const [newComment, setNewComment] = useState('');
   const [loading, setLoading] = useState(true);
   const [commentLoading, setCommentLoading] = useState(false);
@@ -26,6 +30,29 @@ const IdeaDetail = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id]);
 
+  // Live like counts and comments pushed by the server (ASGI deployments)
+  useEffect(() => {
+    if (!id || id === 'undefined' || typeof EventSource === 'undefined') return undefined;
+    const source = new EventSource(`/api/stream/ideas/${id}/`);
+    const parse = (e) => JSON.parse(e.data);
+
+    source.addEventListener('likes', (e) => {
+      setLikes(parse(e).likes_count);
+    });
+    source.addEventListener('comment', (e) => addComment(parse(e).comment));
+    source.addEventListener('comment_removed', (e) => {
+      const { comment_id: commentId } = parse(e);
+      seenCommentIds.current.delete(commentId);
+      setComments((prev) => prev.filter((c) => c.id !== commentId));
+      setCommentsCount((count) => Math.max(count - 1, 0));
+    });
+    source.addEventListener('idea_changed', () => fetchIdea());
+    source.addEventListener('resync', () => fetchIdea());
+
+    return () => source.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [id]);
+
   // Guard for undefined id (after hooks)
   if (!id || id === 'undefined') {
     return (
@@ -43,6 +70,9 @@ const IdeaDetail = () => {
       const response = await axios.get(`/api/ideas/${id}/`);
       setIdea(response.data);
       setComments(response.data.comments || []);
+      seenCommentIds.current = new Set((response.data.comments || []).map((c) => c.id));
+      setCommentsCount(response.data.comments_count || 0);
+      setCommentsNext(response.data.comments_next);
       setLikes(response.data.likes_count);
       setIsLiked(response.data.is_liked);
     } catch (error) {
@@ -53,6 +83,31 @@ const IdeaDetail = () => {
     }
   };
 
+  // Comments can arrive both from our own POST and from the live stream
+  const addComment = (comment) => {
+    if (seenCommentIds.current.has(comment.id)) return;
+    seenCommentIds.current.add(comment.id);
+    setComments((prev) => [comment, ...prev]);
+    setCommentsCount((count) => count + 1);
+  };
+
+  const fetchMoreComments = async () => {
+    if (!commentsNext) return;
+    setMoreCommentsLoading(true);
+    try {
+      // Request through the dev proxy rather than the absolute URL
+      const { pathname, search } = new URL(commentsNext);
+      const response = await axios.get(pathname + search);
+      response.data.results.forEach((c) => seenCommentIds.current.add(c.id));
+      setComments((prev) => [...prev, ...response.data.results]);
+      setCommentsNext(response.data.next);
+    } catch (error) {
+      console.error('Error fetching comments:', error);
+    } finally {
+      setMoreCommentsLoading(false);
+    }
+  };
+
   const handleLike = async () => {
     if (!isAuthenticated) {
       alert('Please login to like ideas');
@@ -85,7 +140,7 @@ const IdeaDetail = () => {
       const response = await axios.post(`/api/ideas/${id}/add_comment/`, {
         content: newComment
       });
-      setComments([response.data, ...comments]);
+      addComment(response.data);
       setNewComment('');
     } catch (error) {
       console.error('Error posting comment:', error);
@@ -136,7 +191,7 @@ const IdeaDetail = () => {
                 ❤️ {likes} likes
               </span>
               <span className="comments-count">
-                💬 {comments.length} comments
+                💬 {commentsCount} comments
               </span>
             </div>
 
@@ -153,7 +208,7 @@ const IdeaDetail = () => {
         </div>
 
         <div className="comments-section">
-          <h3 className="comments-title">Comments ({comments.length})</h3>
+          <h3 className="comments-title">Comments ({commentsCount})</h3>
           
           {isAuthenticated ? (
             <form onSubmit={handleCommentSubmit} className="comment-form">
@@ -198,6 +253,16 @@ const IdeaDetail = () => {
               ))
             )}
           </div>
+
+          {commentsNext && (
+            <button
+              className="btn btn-secondary"
+              onClick={fetchMoreComments}
+              disabled={moreCommentsLoading}
+            >
+              {moreCommentsLoading ? 'Loading...' : 'Load more comments'}
+            </button>
+          )}
         </div>
       </div>
     </div>
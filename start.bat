@@ -6,6 +6,9 @@ echo Starting Django Backend...
 cd backend
 start "Django Backend" cmd /k "python manage.py runserver"
 
+echo Starting Job Worker...
+start "Job Worker" cmd /k "python manage.py run_jobs"
+
 echo Starting React Frontend...
 cd ../frontend
 start "React Frontend" cmd /k "npm start"
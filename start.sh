@@ -8,6 +8,10 @@ cd backend
 python manage.py runserver &
 BACKEND_PID=$!
 
+echo "Starting Job Worker..."
+python manage.py run_jobs &
+WORKER_PID=$!
+
 echo "Starting React Frontend..."
 cd ../frontend
 npm start &
@@ -21,5 +25,5 @@ echo
 echo "Press Ctrl+C to stop both servers"
 
 # Wait for user to stop the servers
-trap "echo 'Stopping servers...'; kill $BACKEND_PID $FRONTEND_PID; exit" INT
+trap "echo 'Stopping servers...'; kill $BACKEND_PID $WORKER_PID $FRONTEND_PID; exit" INT
 wait 
\ No newline at end of file